@@ -0,0 +1,41 @@
+/**
+ * API Route: Portfolio summary
+ * Serve the NFT and loan aggregates written by nft_analytics.py
+ */
+
+import fs from 'fs'
+import path from 'path'
+import { NextResponse } from 'next/server'
+import { safeLogger } from '@/lib/security'
+
+const SUMMARY_PATH = path.join(process.cwd(), 'data', 'portfolio-summary.json')
+
+export async function GET() {
+    try {
+        if (!fs.existsSync(SUMMARY_PATH)) {
+            return NextResponse.json(
+                {
+                    success: false,
+                    error: 'Portfolio summary not generated yet (run: python3 nft_analytics.py)'
+                },
+                { status: 404 }
+            )
+        }
+
+        const summary = JSON.parse(fs.readFileSync(SUMMARY_PATH, 'utf-8'))
+
+        return NextResponse.json({
+            success: true,
+            data: summary
+        })
+    } catch (error: any) {
+        safeLogger.error('Error reading portfolio summary:', error)
+        return NextResponse.json(
+            {
+                success: false,
+                error: 'Failed to read portfolio summary'
+            },
+            { status: 500 }
+        )
+    }
+}
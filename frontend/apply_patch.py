@@ -0,0 +1,42 @@
+#!/usr/bin/env python3
+"""Apply a multi-file unified diff (e.g. from run_migrations.py --emit-patch).
+
+Usage: python3 apply_patch.py [--check] [-p N] [--root DIR] PATCH
+
+All files are patched in memory first and only written once every hunk has
+applied, so a failing patch leaves the tree untouched. PATCH may be '-'.
+Migrations named in the patch (see codemod/patch.py) are recorded in the
+journal of the checkout they were applied to, as run_migrations.py records
+the ones it runs.
+"""
+import argparse
+import sys
+
+from codemod.patch import PatchError, apply_patch
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('patch', help="patch file, or '-' for stdin")
+    parser.add_argument('--root', default='.', help='directory the patch paths are relative to')
+    parser.add_argument('-p', dest='strip', type=int, default=1, help='leading path components to strip (default 1)')
+    parser.add_argument('--check', action='store_true', help='only check that the patch applies')
+    args = parser.parse_args()
+
+    try:
+        if args.patch == '-':
+            paths = apply_patch(sys.stdin, args.root, args.strip, args.check)
+        else:
+            with open(args.patch, 'r', encoding='utf-8') as f:
+                paths = apply_patch(f, args.root, args.strip, args.check)
+    except (PatchError, OSError) as e:
+        print(f"❌ {e}")
+        sys.exit(1)
+
+    verb = 'applies cleanly to' if args.check else 'applied to'
+    for path in paths:
+        print(f"✅ Patch {verb} {path}")
+
+
+if __name__ == '__main__':
+    main()
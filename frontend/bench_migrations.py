@@ -0,0 +1,212 @@
+#!/usr/bin/env python3
+"""Benchmark the migration transforms on synthetic TSX files.
+
+Usage:
+    python3 bench_migrations.py [--sizes 1000,10000,100000,1000000] [--output bench_results.json]
+    python3 bench_migrations.py --compare baseline.json [--threshold 1.25]
+
+For every size, two synthetic files are generated: one containing the blocks
+the migrations look for ("with") and one without them ("without"). Each
+transform is run on both and its wall time, peak memory (tracemalloc), the
+characters its rules replaced (the bytes_replaced totals of codemod.metrics)
+and the size of its output, if it changed anything, are recorded as JSON. With --compare, results slower than THRESHOLD x the baseline are
+reported and the exit status is 1.
+"""
+import argparse
+import contextlib
+import json
+import os
+import platform
+import sys
+import time
+import tracemalloc
+
+import add_nft_tab
+import fix_imports
+import fix_wheat_import
+import remove_indonesian_text
+import restructure_tabs
+import update_crop_dropdown
+from codemod import metrics
+
+TRANSFORMS = [
+    ('add_nft_tab', add_nft_tab.transform),
+    ('restructure_tabs', restructure_tabs.transform),
+    ('update_crop_dropdown', update_crop_dropdown.transform),
+    ('fix_imports', fix_imports.transform),
+    ('fix_wheat_import', fix_wheat_import.transform),
+    ('remove_indonesian_text', remove_indonesian_text.transform),
+]
+DEFAULT_SIZES = [1000, 10000, 100000, 1000000]
+# Ignore regressions on timings too small to measure reliably
+MIN_SECONDS = 0.001
+
+# Page header before and after migration
+HEADER = """'use client'
+
+import { useState, useEffect } from 'react'
+import { Sprout, Plus, List, TrendingUp, DollarSign, Package, AlertCircle, CheckCircle2, Clock, Shield, Lock, ExternalLink } from 'lucide-react'
+import Link from 'next/link'
+import { hbarToWei, debugHBARTransaction, validateHBARAmount } from '@/lib/hbarUtils'
+
+export default function FarmerDashboard() {
+    const [activeTab, setActiveTab] = useState<'create' | 'loans'>('create')
+    return (
+        <div className="container mx-auto px-4 py-8">
+"""
+MIGRATED_HEADER = """'use client'
+
+import { useState, useEffect } from 'react'
+import { Sprout, Plus, List, TrendingUp, DollarSign, Package, AlertCircle, CheckCircle2, Clock, Shield, Lock, ExternalLink, Wheat, X } from 'lucide-react'
+import Link from 'next/link'
+import { hbarToWei, debugHBARTransaction, validateHBARAmount } from '@/lib/hbarUtils'
+import CreateHarvestNFTForm from '@/components/CreateHarvestNFTForm'
+import MyHarvestNFTs from '@/components/MyHarvestNFTs'
+
+export default function FarmerDashboard() {
+    const [activeTab, setActiveTab] = useState<'create' | 'nfts'>('create')
+    const [selectedNFTForLoan, setSelectedNFTForLoan] = useState<any>(null)
+    return (
+        <div className="container mx-auto px-4 py-8">
+"""
+FOOTER = """        </div>
+    )
+}
+"""
+FILLER = [
+    '            <div className="flex items-center gap-2" key="row-{i}">',
+    '                <span className="text-sm text-gray-600">{{item{n}.label}}</span>',
+    '                <p className="font-semibold">Estimated value: {{formatHBAR(item{n}.value)}} HBAR</p>',
+    '                <button onClick={{() => handleSelect({n})}} className="btn-secondary">Select</button>',
+    '                <option value="Crop{n}">Crop {n}</option>',
+    '            </div>',
+]
+
+
+def synthetic_tsx(lines, with_targets):
+    """Return a synthetic farmer page of roughly ``lines`` lines."""
+    body = []
+    targets = []
+    if with_targets:
+        targets = [
+            '            <div className="flex gap-4 mb-8">',
+            add_nft_tab.my_loans_button,
+            '                ' + add_nft_tab.old_content_render,
+            update_crop_dropdown.old_dropdown,
+            '                <option value="Rice">Rice (Padi)</option>',
+        ]
+    header = HEADER if with_targets else MIGRATED_HEADER
+    filler_lines = max(lines - header.count('\n') - FOOTER.count('\n') - sum(t.count('\n') + 1 for t in targets), 0)
+    middle = filler_lines // 2
+    for i in range(filler_lines):
+        if i == middle:
+            body.extend(targets)
+        body.append(FILLER[i % len(FILLER)].format(i=i, n=i % 97))
+    if filler_lines <= middle:
+        body.extend(targets)
+    return header + '\n'.join(body) + '\n' + FOOTER
+
+
+def measure(transform, content, repeat):
+    with open(os.devnull, 'w') as devnull, contextlib.redirect_stdout(devnull):
+        best = None
+        for _ in range(repeat):
+            start = time.perf_counter()
+            output = transform(content)
+            elapsed = time.perf_counter() - start
+            best = elapsed if best is None else min(best, elapsed)
+
+        # Separate run for memory: tracemalloc slows allocation down
+        tracemalloc.start()
+        transform(content)
+        _, peak = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+
+        # And one with metrics on, to total what the rules replaced
+        records = []
+        metrics.add_hook(records.append)
+        try:
+            transform(content)
+        finally:
+            metrics.remove_hook(records.append)
+    replaced = sum(record['bytes_replaced'] for record in records)
+    written = len(output.encode('utf-8')) if output != content else 0
+    return best, peak, replaced, written
+
+
+def run(sizes, repeat):
+    results = []
+    for lines in sizes:
+        for variant in ('with', 'without'):
+            content = synthetic_tsx(lines, variant == 'with')
+            size = len(content.encode('utf-8'))
+            for name, transform in TRANSFORMS:
+                wall, peak, replaced, written = measure(transform, content, repeat)
+                results.append({
+                    'transform': name,
+                    'lines': lines,
+                    'variant': variant,
+                    'bytes_in': size,
+                    'wall_s': wall,
+                    'peak_bytes': peak,
+                    'bytes_replaced': replaced,
+                    'bytes_written': written,
+                })
+                print(f"{name:<24} {lines:>8} lines {variant:<8} {wall * 1000:10.2f} ms "
+                      f"{peak / 1e6:9.2f} MB peak {replaced:>9} B replaced {written:>9} B written", flush=True)
+    return results
+
+
+def compare(results, baseline, threshold):
+    """Return the results slower than ``threshold`` x their baseline entry."""
+    reference = {(r['transform'], r['lines'], r['variant']): r for r in baseline['results']}
+    regressions = []
+    for result in results:
+        old = reference.get((result['transform'], result['lines'], result['variant']))
+        if old is None or result['wall_s'] < MIN_SECONDS:
+            continue
+        if result['wall_s'] > old['wall_s'] * threshold:
+            regressions.append((result, old))
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--sizes', default=','.join(map(str, DEFAULT_SIZES)),
+                        help='comma-separated line counts (default: %(default)s)')
+    parser.add_argument('--repeat', type=int, default=3, help='timed runs per case, best is kept')
+    parser.add_argument('--output', default='bench_results.json', help='where to write the JSON results')
+    parser.add_argument('--compare', metavar='BASELINE', help='baseline JSON to check for regressions')
+    parser.add_argument('--threshold', type=float, default=1.25,
+                        help='slowdown factor flagged as a regression (default: %(default)s)')
+    args = parser.parse_args()
+
+    sizes = [int(s) for s in args.sizes.split(',') if s]
+    results = run(sizes, args.repeat)
+    report = {
+        'meta': {
+            'python': platform.python_version(),
+            'platform': platform.platform(),
+            'timestamp': time.strftime('%Y-%m-%dT%H:%M:%S'),
+            'repeat': args.repeat,
+        },
+        'results': results,
+    }
+    with open(args.output, 'w', encoding='utf-8') as f:
+        json.dump(report, f, indent=2)
+    print(f"✅ Results written to {args.output}")
+
+    if args.compare:
+        with open(args.compare, 'r', encoding='utf-8') as f:
+            baseline = json.load(f)
+        regressions = compare(results, baseline, args.threshold)
+        for result, old in regressions:
+            print(f"❌ {result['transform']} ({result['lines']} lines, {result['variant']}): "
+                  f"{old['wall_s'] * 1000:.2f} ms -> {result['wall_s'] * 1000:.2f} ms")
+        if regressions:
+            sys.exit(1)
+        print(f"✅ No regressions beyond {args.threshold}x")
+
+
+if __name__ == '__main__':
+    main()
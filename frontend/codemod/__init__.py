@@ -0,0 +1,7 @@
+"""Shared helpers for the frontend migration scripts.
+
+The scripts next to this package (``add_nft_tab.py``, ``fix_imports.py`` ...)
+each expose a ``transform(content)`` function; ``run_migrations.py`` chains
+them through :mod:`codemod.pipeline` so every target file is read and written
+once per run.
+"""
@@ -0,0 +1,113 @@
+"""Persistent content-hash cache for skipping unchanged files.
+
+Each entry records the size, mtime and SHA-256 of a file as it was left by
+the last successful run, together with the version of the rule set that
+produced it. A file is skipped when the rule set is unchanged and either its
+stat still matches or, failing that, its content hash does.
+"""
+import hashlib
+import json
+import os
+import sys
+
+CACHE_FILE = '.codemod-cache.json'
+CACHE_FORMAT = 1
+MAX_ENTRIES = 10000
+
+
+def hash_bytes(data):
+    return hashlib.sha256(data).hexdigest()
+
+
+def hash_path(path, chunk_size=1 << 20):
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for chunk in iter(lambda: f.read(chunk_size), b''):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def ruleset_version(stages):
+    """Fingerprint a stage list by stage names and their module sources."""
+    digest = hashlib.sha256(str(CACHE_FORMAT).encode())
+    for stage in stages:
+        digest.update(stage.name.encode())
+        module = sys.modules.get(getattr(stage.transform, '__module__', None))
+        source = getattr(module, '__file__', None)
+        if source and os.path.exists(source):
+            with open(source, 'rb') as f:
+                digest.update(f.read())
+    return digest.hexdigest()[:16]
+
+
+class FileCache:
+    """JSON-backed cache with least-recently-used eviction."""
+
+    def __init__(self, path, max_entries=MAX_ENTRIES):
+        self.path = path
+        self.max_entries = max_entries
+        self.entries = {}
+        self.dirty = False
+        try:
+            with open(path, 'r', encoding='utf-8') as f:
+                data = json.load(f)
+            if data.get('format') == CACHE_FORMAT:
+                self.entries = data.get('entries', {})
+        except (OSError, ValueError, AttributeError):
+            # Missing or unreadable cache: start empty
+            pass
+
+    @staticmethod
+    def version(stages):
+        return ruleset_version(stages)
+
+    @staticmethod
+    def key(path):
+        return os.path.abspath(path)
+
+    def _touch(self, key, entry):
+        # Re-insert so dict order doubles as recency order
+        self.entries.pop(key, None)
+        self.entries[key] = entry
+        self.dirty = True
+
+    def is_fresh(self, path, version):
+        """Return True if ``path`` is unchanged since it was recorded."""
+        key = self.key(path)
+        entry = self.entries.get(key)
+        if entry is None or entry['version'] != version:
+            return False
+        try:
+            st = os.stat(path)
+        except OSError:
+            return False
+        if entry['size'] == st.st_size and entry['mtime_ns'] == st.st_mtime_ns:
+            self._touch(key, entry)
+            return True
+        # Touched but possibly identical (checkout, copy): compare content
+        if entry['size'] != st.st_size or hash_path(path) != entry['hash']:
+            return False
+        entry['mtime_ns'] = st.st_mtime_ns
+        self._touch(key, entry)
+        return True
+
+    def record(self, path, version, content):
+        """Remember ``path`` as processed, ``content`` being what it holds now."""
+        st = os.stat(path)
+        self._touch(self.key(path), {
+            'version': version,
+            'size': st.st_size,
+            'mtime_ns': st.st_mtime_ns,
+            'hash': hash_bytes(content.encode('utf-8')),
+        })
+        while len(self.entries) > self.max_entries:
+            del self.entries[next(iter(self.entries))]
+
+    def save(self):
+        if not self.dirty:
+            return
+        tmp = self.path + '.tmp'
+        with open(tmp, 'w', encoding='utf-8') as f:
+            json.dump({'format': CACHE_FORMAT, 'entries': self.entries}, f)
+        os.replace(tmp, self.path)
+        self.dirty = False
@@ -0,0 +1,178 @@
+"""Crop dropdown generation from ``crop_catalog.json``.
+
+The catalog lists crop categories with per-locale labels. It is compiled
+into the JSX children of a ``<select>`` (everything after the placeholder
+option), cached on disk by catalog hash and locale, and spliced into every
+``<select value={formData.cropType}>`` found in a file.
+
+Locales are catalog locale codes (``'en'``, ``'id'``) or ``'en+id'`` for a
+primary label followed by a secondary one in parentheses, as in
+``Rice (Padi)``.
+
+``hashlib`` and ``json`` are imported where used: packed per-file runs (see
+:mod:`codemod.pack`) only need :func:`rewrite_dropdowns`.
+"""
+import os
+
+CATALOG_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'crop_catalog.json')
+FRAGMENT_CACHE_FILE = '.codemod-fragments.json'
+CROP_SELECT_MARKER = 'value={formData.cropType}'
+INDENT = '    '
+
+# (catalog path, catalog hash) -> parsed catalog, per process
+_catalogs = {}
+
+
+def load_catalog(path=CATALOG_PATH):
+    """Return ``(catalog, catalog hash)``."""
+    import hashlib
+    import json
+    with open(path, 'rb') as f:
+        raw = f.read()
+    digest = hashlib.sha256(raw).hexdigest()[:16]
+    key = (path, digest)
+    if key not in _catalogs:
+        _catalogs[key] = json.loads(raw.decode('utf-8'))
+    return _catalogs[key], digest
+
+
+def _label(labels, locale):
+    primary, _, secondary = locale.partition('+')
+    text = labels.get(primary) or labels['en']
+    if secondary and labels.get(secondary) and labels[secondary] != text:
+        text = f"{text} ({labels[secondary]})"
+    return text
+
+
+def render_fragment(catalog, locale='en'):
+    """Render the optgroups of ``catalog`` with no base indentation."""
+    primary = locale.partition('+')[0]
+    blocks = []
+    for category in catalog['categories']:
+        label = _label(category['label'], primary)
+        lines = [
+            f"{{/* {label} */}}",
+            f"<optgroup label=\"{category['emoji']} {label}\">",
+        ]
+        for crop in category['crops']:
+            lines.append(f"{INDENT}<option value=\"{crop['value']}\">{_label(crop['label'], locale)}</option>")
+        lines.append('</optgroup>')
+        blocks.append('\n'.join(lines))
+    return '\n\n'.join(blocks)
+
+
+class FragmentCache:
+    """On-disk cache of rendered fragments keyed by catalog hash and locale."""
+
+    def __init__(self, path=FRAGMENT_CACHE_FILE):
+        import json
+        self.path = path
+        self.fragments = {}
+        self.hits = 0
+        try:
+            with open(path, 'r', encoding='utf-8') as f:
+                self.fragments = json.load(f)
+        except (OSError, ValueError):
+            pass
+
+    def get(self, catalog_hash, locale, render):
+        key = f"{catalog_hash}:{locale}"
+        if key in self.fragments:
+            self.hits += 1
+        else:
+            # Entries of older catalogs are dead weight once the hash changes
+            self.fragments = {k: v for k, v in self.fragments.items() if k.startswith(catalog_hash + ':')}
+            self.fragments[key] = render()
+            self.save()
+        return self.fragments[key]
+
+    def save(self):
+        import json
+        tmp = self.path + '.tmp'
+        with open(tmp, 'w', encoding='utf-8') as f:
+            json.dump(self.fragments, f, ensure_ascii=False)
+        os.replace(tmp, self.path)
+
+
+def compile_fragment(locale='en', catalog_path=CATALOG_PATH, cache=None):
+    catalog, digest = load_catalog(catalog_path)
+    if cache is None:
+        return render_fragment(catalog, locale)
+    return cache.get(digest, locale, lambda: render_fragment(catalog, locale))
+
+
+def _tag_end(content, start):
+    """Index of the ``>`` closing the tag opened at ``start``, skipping
+    ``{...}`` expressions and quoted attribute values."""
+    depth = 0
+    quote = None
+    for i in range(start, len(content)):
+        ch = content[i]
+        if quote:
+            if ch == quote:
+                quote = None
+        elif ch in '"\'`' and depth == 0:
+            quote = ch
+        elif ch == '{':
+            depth += 1
+        elif ch == '}':
+            depth -= 1
+        elif ch == '>' and depth == 0:
+            return i
+    return -1
+
+
+def replace_dropdowns(content, fragment):
+    """Replace the options of every crop ``<select>`` with ``fragment``.
+
+    The placeholder option (``value=""``) of each select is kept. Returns
+    ``(content, number of selects updated)``.
+    """
+    content, count, _ = rewrite_dropdowns(content, fragment)
+    return content, count
+
+
+def rewrite_dropdowns(content, fragment):
+    """:func:`replace_dropdowns`, also returning the number of characters
+    of ``content`` replaced: ``(content, selects updated, replaced)``."""
+    pieces = []
+    pos = 0
+    count = 0
+    replaced = 0
+    marker = content.find(CROP_SELECT_MARKER)
+    while marker != -1:
+        select = content.rfind('<select', pos, marker)
+        open_end = _tag_end(content, select) if select != -1 else -1
+        close = content.find('</select>', open_end)
+        if close == -1 and open_end != -1:
+            # Nothing closes after this select, so no later one can match
+            break
+        if select == -1 or open_end < marker or close == -1:
+            marker = content.find(CROP_SELECT_MARKER, marker + 1)
+            continue
+
+        line_start = content.rfind('\n', 0, select) + 1
+        indent = content[line_start:select]
+        child = indent + INDENT if not indent.strip() else INDENT
+        children = content[open_end + 1:close]
+
+        lines = ['']
+        placeholder_start = children.find('<option value="">')
+        if placeholder_start != -1:
+            placeholder_end = children.find('</option>', placeholder_start) + len('</option>')
+            lines += [child + children[placeholder_start:placeholder_end], '']
+        lines += [child + line if line else line for line in fragment.split('\n')]
+        new_children = '\n'.join(lines) + '\n' + (indent if not indent.strip() else '')
+
+        if new_children != children:
+            pieces.append(content[pos:open_end + 1])
+            pieces.append(new_children)
+            pos = close
+            count += 1
+            replaced += len(children)
+        marker = content.find(CROP_SELECT_MARKER, close)
+
+    if not count:
+        return content, 0, 0
+    pieces.append(content[pos:])
+    return ''.join(pieces), count, replaced
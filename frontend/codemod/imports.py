@@ -0,0 +1,232 @@
+"""Model of the import block at the top of a TS/TSX file.
+
+Only the file header is parsed: leading comments, directives such as
+``'use client'`` and the import statements that follow. Parsing stops at
+the first other statement, so the cost does not grow with the file body.
+"""
+import re
+
+IMPORT_RE = re.compile(r'''
+    import\s+
+    (?:(?P<type>type)\s+(?=[{*]|[A-Za-z_$][\w$]*\s*(?:,|from\b)))?
+    (?:(?P<default>(?!from\b)[A-Za-z_$][\w$]*)\s*(?:,\s*)?)?
+    (?:\*\s*as\s+(?P<namespace>[A-Za-z_$][\w$]*)\s*)?
+    (?:\{(?P<named>[^}]*)\}\s*)?
+    from\s*(?P<quote>['"])(?P<module>[^'"]+)(?P=quote)
+    (?P<semi>[ \t]*;)?
+  | import\s*(?P<side_quote>['"])(?P<side_module>[^'"]+)(?P=side_quote)
+    (?P<side_semi>[ \t]*;)?
+''', re.VERBOSE)
+SKIP_RE = re.compile(r'''
+    \s+
+  | //[^\n]*
+  | /\*.*?\*/
+  | (?P<q>['"])use\ [\w-]+(?P=q)[ \t]*;?
+''', re.VERBOSE | re.DOTALL)
+
+
+def local_name(specifier):
+    """``'A as B'`` -> ``'B'``; ``'type A'`` -> ``'A'``."""
+    parts = specifier.split()
+    return parts[-1] if parts else ''
+
+
+def imported_name(specifier):
+    """``'A as B'`` -> ``'A'``; ``'type A'`` -> ``'A'``."""
+    parts = [p for p in specifier.split() if p != 'type']
+    return parts[0] if parts else ''
+
+
+class ImportStatement:
+    """One ``import ... from '...'`` statement."""
+
+    def __init__(self, module, default=None, namespace=None, named=None,
+                 type_only=False, quote="'", semi='', start=None, end=None, text=None):
+        self.module = module
+        self.default = default
+        self.namespace = namespace
+        # None means the statement has no braces at all
+        self.named = named
+        self.type_only = type_only
+        self.quote = quote
+        self.semi = semi
+        self.start = start
+        self.end = end
+        self.text = text
+        self.multiline = False
+        self.indent = '    '
+        self.trailing_comma = False
+        self.dirty = text is None
+
+    @classmethod
+    def from_match(cls, match):
+        if match.group('side_module'):
+            return cls(match.group('side_module'), quote=match.group('side_quote'),
+                       semi=match.group('side_semi') or '', start=match.start(),
+                       end=match.end(), text=match.group())
+        named = None
+        raw = match.group('named')
+        statement = cls(match.group('module'), default=match.group('default'),
+                        namespace=match.group('namespace'), type_only=bool(match.group('type')),
+                        quote=match.group('quote'), semi=match.group('semi') or '',
+                        start=match.start(), end=match.end(), text=match.group())
+        if raw is not None:
+            named = [s.strip() for s in raw.split(',') if s.strip()]
+            if '\n' in raw:
+                statement.multiline = True
+                first = raw.lstrip('\n').split('\n', 1)[0]
+                statement.indent = first[:len(first) - len(first.lstrip())] or '    '
+            statement.trailing_comma = raw.rstrip().endswith(',')
+        statement.named = named
+        return statement
+
+    def specifiers(self):
+        """Yield ``(imported name, local name)`` pairs."""
+        if self.default:
+            yield 'default', self.default
+        if self.namespace:
+            yield '*', self.namespace
+        for specifier in self.named or ():
+            yield imported_name(specifier), local_name(specifier)
+
+    def render(self):
+        if not self.dirty:
+            return self.text
+        quoted = f"{self.quote}{self.module}{self.quote}"
+        parts = []
+        if self.default:
+            parts.append(self.default)
+        if self.namespace:
+            parts.append(f"* as {self.namespace}")
+        if self.named is not None:
+            if not self.named:
+                parts.append('{}')
+            elif self.multiline:
+                body = (',\n' + self.indent).join(self.named)
+                comma = ',' if self.trailing_comma else ''
+                parts.append(f"{{\n{self.indent}{body}{comma}\n}}")
+            else:
+                parts.append('{ ' + ', '.join(self.named) + ' }')
+        if not parts:
+            return f"import {quoted}{self.semi}"
+        keyword = 'import type' if self.type_only else 'import'
+        return f"{keyword} {', '.join(parts)} from {quoted}{self.semi}"
+
+
+class ImportBlock:
+    """Parsed import statements of a file, indexed by module and name."""
+
+    def __init__(self, content):
+        self.content = content
+        self.statements = []
+        self.by_module = {}
+        self.imported = set()
+        self.locals = {}
+        # New statements to insert after the statement at a given index
+        # (-1: at the end of the header)
+        self.inserts = {}
+
+        pos = 0
+        self.header_end = 0
+        while pos < len(content):
+            match = IMPORT_RE.match(content, pos)
+            if match:
+                self._index(ImportStatement.from_match(match))
+                pos = self.header_end = match.end()
+                continue
+            skip = SKIP_RE.match(content, pos)
+            if not skip:
+                break
+            if skip.group('q'):
+                self.header_end = skip.end()
+            pos = skip.end()
+
+    def _index(self, statement):
+        self.statements.append(statement)
+        self.by_module.setdefault(statement.module, []).append(statement)
+        for imported, local in statement.specifiers():
+            self.imported.add((statement.module, imported))
+            self.locals[local] = statement.module
+
+    def has(self, name, module=None):
+        """Is ``name`` imported (from ``module``, if given)?
+
+        ``name`` is matched against local names, or against imported names
+        when ``module`` is given (use ``'default'`` for default imports).
+        """
+        if module is None:
+            return name in self.locals
+        return (module, name) in self.imported or self.locals.get(name) == module
+
+    def add(self, name, module, default=False, after=None):
+        """Import ``name`` from ``module``, merging into an existing import
+        of that module when there is one.
+
+        New statements go after the import of module ``after`` if present,
+        else at the end of the import block. Returns False if ``name`` was
+        already imported from ``module``.
+        """
+        if self.has(name, module):
+            return False
+        for statement in self.by_module.get(module, ()):
+            if statement.type_only:
+                continue
+            if default and not statement.default:
+                statement.default = name
+            elif not default and statement.named is not None:
+                statement.named.append(name)
+            elif not default and not statement.namespace:
+                statement.named = [name]
+            else:
+                continue
+            statement.dirty = True
+            self.imported.add((module, 'default' if default else name))
+            self.locals[name] = module
+            return True
+
+        quote = self.statements[0].quote if self.statements else "'"
+        semi = self.statements[0].semi if self.statements else ''
+        if default:
+            statement = ImportStatement(module, default=name, quote=quote, semi=semi)
+        else:
+            statement = ImportStatement(module, named=[name], quote=quote, semi=semi)
+        parsed = [s for s in self.by_module.get(after, ()) if s.start is not None]
+        anchor = -1
+        if parsed:
+            anchor = self.statements.index(parsed[-1])
+        elif self.statements:
+            anchor = len(self.statements) - 1
+        self.inserts.setdefault(anchor, []).append(statement)
+        self.by_module.setdefault(module, []).append(statement)
+        for imported, local in statement.specifiers():
+            self.imported.add((module, imported))
+            self.locals[local] = module
+        return True
+
+    @property
+    def changed(self):
+        return bool(self.inserts) or any(s.dirty for s in self.statements)
+
+    def replaced(self):
+        """Number of characters of the content that :meth:`render` rewrites."""
+        return sum(statement.end - statement.start for statement in self.statements if statement.dirty)
+
+    def render(self):
+        """Return the file content with the updated import block."""
+        if not self.changed:
+            return self.content
+        pieces = []
+        pos = 0
+        for i, statement in enumerate(self.statements):
+            pieces.append(self.content[pos:statement.start])
+            pieces.append(statement.render())
+            for new in self.inserts.get(i, ()):
+                pieces.append('\n' + new.render())
+            pos = statement.end
+        if not self.statements and -1 in self.inserts:
+            pieces.append(self.content[:self.header_end])
+            pos = self.header_end
+            lines = '\n'.join(s.render() for s in self.inserts[-1])
+            pieces.append('\n\n' + lines if pos else lines + '\n\n')
+        pieces.append(self.content[pos:])
+        return ''.join(pieces)
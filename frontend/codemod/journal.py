@@ -0,0 +1,128 @@
+"""Per-file journal of applied migrations.
+
+Like a database's schema-migrations table: for every target file the journal
+lists the migrations (stage names) applied to it, in order, each with the
+hash of the file content the run that applied it started from, plus the
+hash of the file as the last run left it. The pending stages of a file are
+the ones not listed, so deciding what to run is a lookup rather than a scan
+for marker text, and stages need no guards to be safe to run again.
+
+A file whose hash equals the starting hash of an applied migration has been
+reverted (e.g. by ``git checkout``): that migration and every later one are
+pending again. Any other change is an edit made after the migrations and
+leaves them applied.
+
+The journal lives in the frontend checkout next to the files it describes
+and is committed with them. Checkouts migrated before it existed are
+recorded with ``run_migrations.py --baseline``.
+"""
+import json
+import os
+
+from codemod.cache import hash_bytes
+from codemod.pipeline import run_file
+
+JOURNAL_FILE = '.codemod-journal.json'
+JOURNAL_FORMAT = 1
+
+
+def content_hash(content):
+    return hash_bytes(content.encode('utf-8'))
+
+
+class Journal:
+    """JSON-backed journal of the migrations applied under one checkout."""
+
+    def __init__(self, path):
+        self.path = path
+        self.root = os.path.dirname(os.path.abspath(path))
+        self.files = {}
+        self.dirty = False
+        try:
+            with open(path, 'r', encoding='utf-8') as f:
+                data = json.load(f)
+            if data.get('format') == JOURNAL_FORMAT:
+                self.files = data.get('files', {})
+        except (OSError, ValueError, AttributeError):
+            # Missing or unreadable journal: nothing applied yet
+            pass
+
+    @classmethod
+    def for_root(cls, root):
+        return cls(os.path.join(root, JOURNAL_FILE))
+
+    def key(self, path):
+        return os.path.relpath(os.path.abspath(path), self.root).replace(os.sep, '/')
+
+    def _applied(self, key, digest):
+        """``[migration id, starting hash]`` pairs still applied to the
+        content hashing to ``digest``."""
+        entry = self.files.get(key)
+        if entry is None:
+            return []
+        applied = entry['applied']
+        if digest != entry['hash']:
+            for i, (_, start) in enumerate(applied):
+                if start == digest:
+                    return applied[:i]
+        return applied
+
+    def applied(self, path, content):
+        """IDs of the migrations applied to ``content`` of ``path``, in order."""
+        return [migration for migration, _ in self._applied(self.key(path), content_hash(content))]
+
+    def pending(self, path, stages, content):
+        """The stages not yet applied to ``content`` of ``path``, in order."""
+        applied = set(self.applied(path, content))
+        return [stage for stage in stages if stage.name not in applied]
+
+    def record(self, path, original, migrations, content):
+        """Record that ``migrations`` (IDs, in order) turned ``original`` into
+        ``content``."""
+        if not migrations:
+            return
+        key = self.key(path)
+        start = content_hash(original)
+        applied = self._applied(key, start) + [[migration, start] for migration in migrations]
+        self.files[key] = {'hash': content_hash(content), 'applied': applied}
+        self.dirty = True
+
+    def baseline(self, path, stages, content):
+        """Record every stage as applied to ``content`` without running it.
+
+        Returns the IDs newly recorded.
+        """
+        key = self.key(path)
+        digest = content_hash(content)
+        applied = self._applied(key, digest)
+        known = {migration for migration, _ in applied}
+        added = [stage.name for stage in stages if stage.name not in known]
+        if added or self.files.get(key, {}).get('hash') != digest:
+            # No starting hash: the content before these migrations is unknown
+            self.files[key] = {'hash': digest, 'applied': applied + [[name, None] for name in added]}
+            self.dirty = True
+        return added
+
+    def save(self):
+        if not self.dirty:
+            return
+        tmp = self.path + '.tmp'
+        with open(tmp, 'w', encoding='utf-8') as f:
+            # Committed with the files it describes: keep diffs readable
+            json.dump({'format': JOURNAL_FORMAT, 'files': self.files}, f, indent=2, sort_keys=True)
+            f.write('\n')
+        os.replace(tmp, self.path)
+        self.dirty = False
+
+
+def run_migration(path, stage, root='.'):
+    """Run one script's ``stage`` over ``path`` unless the journal of
+    ``root`` lists it as applied; it is recorded if it changed the file.
+    Returns ``(timings, changed)``: ``timings`` is empty if the journal
+    skipped the stage, which was then not run at all."""
+    journal = Journal.for_root(root)
+    timings, changed = run_file(path, [stage], journal=journal)
+    journal.save()
+    if not timings:
+        print(f"⏭️  Skipped {stage.name}: {JOURNAL_FILE} lists it as applied to {path}")
+    return timings, changed
@@ -0,0 +1,130 @@
+"""Per-rule instrumentation for migration runs.
+
+Rules report one record per application: the file and stage it ran in, the
+rule name, match count, seconds spent, bytes scanned, bytes replaced and
+whether a guard skipped it. Sizes count characters of the decoded text.
+Records go to every registered hook; with no hooks registered, reporting
+costs a list check.
+
+    from codemod import metrics
+
+    metrics.add_hook(print)
+    with metrics.rule('my_rule', bytes_scanned=len(content)) as m:
+        content, m.matches = pattern.subn('', content)
+"""
+import time
+from contextlib import contextmanager
+
+_hooks = []
+# File and stage currently being processed, set by codemod.pipeline
+_context = {'file': None, 'stage': None}
+
+
+def add_hook(hook):
+    """Call ``hook(record)`` for every rule record; ``record`` is a dict."""
+    _hooks.append(hook)
+
+
+def remove_hook(hook):
+    _hooks.remove(hook)
+
+
+def enabled():
+    return bool(_hooks)
+
+
+@contextmanager
+def context(**fields):
+    """Set ``file`` and/or ``stage`` for records emitted inside the block."""
+    saved = dict(_context)
+    _context.update(fields)
+    try:
+        yield
+    finally:
+        _context.update(saved)
+
+
+def emit(rule, matches=0, seconds=0.0, bytes_scanned=0, bytes_replaced=0, skipped_by_guard=False):
+    if not _hooks:
+        return
+    record = {
+        'file': _context['file'],
+        'stage': _context['stage'],
+        'rule': rule,
+        'matches': matches,
+        'seconds': seconds,
+        'bytes_scanned': bytes_scanned,
+        'bytes_replaced': bytes_replaced,
+        'skipped_by_guard': skipped_by_guard,
+    }
+    for hook in _hooks:
+        hook(record)
+
+
+class RuleRecord:
+    """Mutable counters filled in by the code inside :func:`rule`."""
+
+    def __init__(self, bytes_scanned=0):
+        self.matches = 0
+        self.bytes_scanned = bytes_scanned
+        self.bytes_replaced = 0
+        self.skipped_by_guard = False
+
+
+@contextmanager
+def rule(name, bytes_scanned=0):
+    """Time the block and emit a record for rule ``name`` when it exits."""
+    record = RuleRecord(bytes_scanned)
+    start = time.perf_counter()
+    yield record
+    emit(name, record.matches, time.perf_counter() - start, record.bytes_scanned,
+         record.bytes_replaced, record.skipped_by_guard)
+
+
+class JsonLinesHook:
+    """Write each record as one JSON object per line to ``stream``."""
+
+    def __init__(self, stream):
+        self.stream = stream
+
+    def __call__(self, record):
+        # Imported here: per-file runs seldom write metrics (see codemod/pack.py)
+        import json
+        self.stream.write(json.dumps(record) + '\n')
+
+
+class Profile:
+    """Collect records and summarize the hottest rules and files."""
+
+    def __init__(self):
+        self.records = []
+
+    def __call__(self, record):
+        self.records.append(record)
+
+    def _totals(self, key):
+        totals = {}
+        for record in self.records:
+            name = key(record)
+            total = totals.setdefault(name, {'seconds': 0.0, 'matches': 0, 'runs': 0,
+                                             'bytes_scanned': 0, 'skipped': 0})
+            total['seconds'] += record['seconds']
+            total['matches'] += record['matches']
+            total['runs'] += 1
+            total['bytes_scanned'] += record['bytes_scanned']
+            total['skipped'] += record['skipped_by_guard']
+        return sorted(totals.items(), key=lambda item: item[1]['seconds'], reverse=True)
+
+    def report(self, top=10):
+        lines = [f"🔥 Hottest rules (top {top})"]
+        for name, total in self._totals(lambda r: f"{r['stage']}:{r['rule']}")[:top]:
+            lines.append(f"    {name:<52} {total['seconds'] * 1000:9.2f} ms  {total['matches']:>5} matches"
+                         f"  {total['skipped']:>3} skipped  {total['bytes_scanned']:>10} B scanned")
+        idle = [name for name, total in self._totals(lambda r: f"{r['stage']}:{r['rule']}")
+                if not total['matches'] and not total['skipped']]
+        if idle:
+            lines.append("⚠️  Rules that matched nothing: " + ', '.join(idle))
+        lines.append(f"🔥 Hottest files (top {top})")
+        for name, total in self._totals(lambda r: r['file'])[:top]:
+            lines.append(f"    {name:<52} {total['seconds'] * 1000:9.2f} ms  {total['matches']:>5} matches")
+        return '\n'.join(lines)
@@ -0,0 +1,130 @@
+"""Precompiled rule pack for per-file runs.
+
+Importing the migration scripts rebuilds their literal blocks, renders the
+crop catalog and compiles every regex, which costs more than the migrations
+themselves when a git hook or editor save runs them on one file.
+:func:`build` does that work once and writes the resulting steps (see
+:mod:`codemod.steps`) with :mod:`marshal`: rule sets as their rules and
+pattern index, regexes as pattern source and flags, replacements as plain
+text.
+
+A pack records the size and mtime of every source it was built from and
+:func:`load` returns ``None`` once any of them changed, so callers fall back
+to importing the scripts until the pack is rebuilt.
+"""
+import marshal
+import os
+import sys
+
+from codemod.pipeline import Stage
+
+# Next to the scripts it is built from
+PACK_PATH = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), '.codemod-rules.pack')
+PACK_FORMAT = 4
+
+
+def _stat(path):
+    st = os.stat(path)
+    return st.st_size, st.st_mtime_ns
+
+
+def _pack_steps(steps):
+    packed = []
+    for step in steps:
+        kind = step[0]
+        if kind == 'rules':
+            packed.append((kind, step[1].compiled()))
+        elif kind == 'regex':
+            _, name, pattern, replacement = step
+            if not isinstance(pattern, str):
+                pattern = (pattern.pattern, pattern.flags)
+            packed.append((kind, name, pattern, replacement))
+        else:
+            packed.append(tuple(step))
+    return packed
+
+
+def _unpack_steps(packed):
+    steps = []
+    for step in packed:
+        kind = step[0]
+        if kind == 'rules':
+            from codemod.rules import RuleSet
+            steps.append((kind, RuleSet.from_compiled(step[1])))
+        elif kind == 'regex' and not isinstance(step[2], str):
+            import re
+            _, name, (source, flags), replacement = step
+            steps.append((kind, name, re.compile(source, flags), replacement))
+        else:
+            steps.append(step)
+    return steps
+
+
+class PackedTransform:
+    """Stage transform running steps loaded from a pack.
+
+    Unlike the scripts' own transforms it prints nothing. Steps are only
+    rebuilt on first use, so stages of other targets cost nothing.
+    """
+
+    def __init__(self, packed):
+        self.packed = packed
+        self.steps = None
+
+    def __call__(self, content):
+        from codemod.steps import run_steps
+        if self.steps is None:
+            self.steps = _unpack_steps(self.packed)
+        return run_steps(content, self.steps)[0]
+
+
+def build(migrations, path=PACK_PATH, extra_sources=()):
+    """Write the steps of every stage of ``migrations`` to ``path``.
+
+    ``migrations`` maps target paths to stage lists as in
+    ``run_migrations.MIGRATIONS``; each stage's transform must come from a
+    module defining ``STEPS``. ``extra_sources`` are further files the
+    steps were generated from. Returns the number of stages packed.
+    """
+    sources = {}
+    targets = {}
+    for target, stages in migrations.items():
+        packed = []
+        for stage in stages:
+            module = sys.modules[stage.transform.__module__]
+            sources[os.path.abspath(module.__file__)] = None
+            triggers = tuple(stage.triggers) if stage.triggers is not None else None
+            packed.append((stage.name, triggers, _pack_steps(module.STEPS)))
+        targets[target] = packed
+    for source in extra_sources:
+        sources[os.path.abspath(source)] = None
+    sources = {source: _stat(source) for source in sources}
+
+    tmp = path + '.tmp'
+    with open(tmp, 'wb') as f:
+        marshal.dump((PACK_FORMAT, sources, targets), f)
+    os.replace(tmp, path)
+    return sum(len(stages) for stages in targets.values())
+
+
+def load(path=PACK_PATH):
+    """Return ``{target: [Stage, ...]}`` from the pack at ``path``, or
+    ``None`` if it is missing, of another format or out of date."""
+    try:
+        # One read: marshal.load() on a file object reads it piecemeal
+        with open(path, 'rb') as f:
+            pack_format, sources, targets = marshal.loads(f.read())
+    except (OSError, EOFError, ValueError, TypeError):
+        return None
+    if pack_format != PACK_FORMAT:
+        return None
+    for source, stat in sources.items():
+        try:
+            if _stat(source) != stat:
+                return None
+        except OSError:
+            return None
+    return {
+        target: [Stage(name, PackedTransform(steps), triggers) for name, triggers, steps in stages]
+        for target, stages in targets.items()
+    }
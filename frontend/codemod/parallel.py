@@ -0,0 +1,35 @@
+"""Repo-wide file discovery and process-pool fan-out."""
+import os
+from concurrent.futures import ProcessPoolExecutor
+
+# Source directories of a frontend checkout that hold TSX components
+SOURCE_DIRS = ('app', 'components')
+SKIP_DIRS = {'node_modules', '.next', '.git'}
+
+
+def discover(root, dirs=SOURCE_DIRS, suffixes=('.tsx',)):
+    """Return the sorted paths under ``root/<dirs>`` ending in ``suffixes``."""
+    paths = []
+    for name in dirs:
+        top = os.path.join(root, name)
+        for dirpath, dirnames, filenames in os.walk(top):
+            dirnames[:] = [d for d in dirnames if d not in SKIP_DIRS]
+            paths.extend(os.path.join(dirpath, f) for f in filenames if f.endswith(suffixes))
+    return sorted(paths)
+
+
+def run_parallel(func, paths, jobs=None):
+    """Call ``func(path)`` for every path across a process pool.
+
+    ``func`` must be a module-level function so it can be pickled. Returns
+    ``[(path, result), ...]`` in the order of ``paths``.
+    """
+    paths = list(paths)
+    jobs = jobs or os.cpu_count() or 1
+    if jobs == 1 or len(paths) < 2:
+        return [(path, func(path)) for path in paths]
+
+    # A few chunks per worker keeps them busy without per-file IPC overhead
+    chunksize = max(1, len(paths) // (jobs * 4))
+    with ProcessPoolExecutor(max_workers=min(jobs, len(paths))) as pool:
+        return list(zip(paths, pool.map(func, paths, chunksize=chunksize)))
@@ -0,0 +1,260 @@
+"""Unified diffs from in-memory buffers, and a batched patch applier.
+
+Diffs are produced with :mod:`difflib` straight from the before/after
+strings, so previewing a migration never touches the working tree. Patches
+(ours or hand-written ones like ``add-nft-tab.patch``) are applied file by
+file: every hunk for a file is applied in one forward pass over its lines,
+and nothing is written unless all files apply cleanly.
+
+Diffs of migrations are preceded by a :func:`migrations_header` line naming
+the target and the migrations the diff applies. ``patch`` and ``git apply``
+skip it as they skip any text between file diffs; :func:`apply_patch`
+records those migrations in the journal of the patched checkout, as a run
+would have.
+"""
+import difflib
+import os
+import re
+
+from codemod.journal import Journal
+from codemod.pipeline import read_file, update_file, write_file
+
+HUNK_RE = re.compile(r'^@@ -(\d+)(?:,(\d+))? \+(\d+)(?:,(\d+))? @@')
+NO_NEWLINE = '\\ No newline at end of file'
+DEV_NULL = '/dev/null'
+MIGRATIONS_PREFIX = 'codemod-migrations: '
+
+
+class PatchError(Exception):
+    pass
+
+
+def unified_diff(path, before, after, context=3):
+    """Yield the lines of a unified diff of ``before`` -> ``after``.
+
+    ``path`` is written relative, with the usual ``a/`` and ``b/`` prefixes.
+    """
+    path = path.replace(os.sep, '/')
+    old = before.splitlines(keepends=True)
+    new = after.splitlines(keepends=True)
+    for line in difflib.unified_diff(old, new, 'a/' + path, 'b/' + path, n=context):
+        if line.endswith('\n'):
+            yield line
+        else:
+            # Last line of a file without a trailing newline
+            yield line + '\n'
+            yield NO_NEWLINE + '\n'
+
+
+def migrations_header(target, migrations):
+    """Line naming the ``migrations`` (IDs, in order) the diff of ``target``
+    that follows it applies."""
+    return f"{MIGRATIONS_PREFIX}{target.replace(os.sep, '/')} {','.join(migrations)}\n"
+
+
+def changed_region(before, after):
+    """Return ``(start, old end, new end)``: the span of ``before`` that was
+    replaced and where the replacement ends in ``after``, found by trimming
+    their common prefix and suffix."""
+    lo, hi = 0, min(len(before), len(after))
+    # Binary search on slice equality keeps this at C speed
+    while lo < hi:
+        mid = (lo + hi + 1) // 2
+        if before[:mid] == after[:mid]:
+            lo = mid
+        else:
+            hi = mid - 1
+    start = lo
+    lo, hi = 0, min(len(before), len(after)) - start
+    while lo < hi:
+        mid = (lo + hi + 1) // 2
+        if before[len(before) - mid:] == after[len(after) - mid:]:
+            lo = mid
+        else:
+            hi = mid - 1
+    return start, len(before) - lo, len(after) - lo
+
+
+def strip_path(name, strip=1):
+    """Drop the timestamp and the first ``strip`` components of a patch path."""
+    name = name.split('\t', 1)[0].strip()
+    if name == DEV_NULL:
+        return None
+    parts = name.split('/')
+    return '/'.join(parts[strip:]) if len(parts) > strip else parts[-1]
+
+
+class Hunk:
+    def __init__(self, old_start, old_count, new_start, new_count):
+        self.old_start = old_start
+        self.old_count = old_count
+        self.new_start = new_start
+        self.new_count = new_count
+        # Expected and replacement lines, newlines included
+        self.old = []
+        self.new = []
+
+
+class FilePatch:
+    def __init__(self, old_path, new_path, migrations=None):
+        self.old_path = old_path
+        self.new_path = new_path
+        self.hunks = []
+        # (target, [migration ID, ...]) from a migrations header, or None
+        self.migrations = migrations
+
+    @property
+    def path(self):
+        return self.new_path or self.old_path
+
+
+def parse_patch(lines, strip=1):
+    """Parse an iterable of patch lines into :class:`FilePatch` objects."""
+    patches = []
+    current = None
+    hunk = None
+    last = None
+    old_name = None
+    migrations = None
+    for line in lines:
+        if line.startswith('--- ') and (hunk is None or not _hunk_open(hunk)):
+            old_name = line[4:].rstrip('\n')
+            continue
+        if line.startswith('+++ ') and old_name is not None:
+            current = FilePatch(strip_path(old_name, strip), strip_path(line[4:].rstrip('\n'), strip), migrations)
+            patches.append(current)
+            old_name = None
+            migrations = None
+            hunk = None
+            continue
+        if line.startswith(MIGRATIONS_PREFIX) and (hunk is None or not _hunk_open(hunk)):
+            target, _, names = line[len(MIGRATIONS_PREFIX):].strip().partition(' ')
+            migrations = (target, [name for name in names.split(',') if name])
+            continue
+        match = HUNK_RE.match(line)
+        if match and current is not None:
+            old_start, old_count, new_start, new_count = match.groups()
+            hunk = Hunk(int(old_start), int(old_count or 1), int(new_start), int(new_count or 1))
+            current.hunks.append(hunk)
+            continue
+        if hunk is None or (not _hunk_open(hunk) and not line.startswith('\\')):
+            # Headers such as "diff --git" or "index ..."
+            continue
+        if line.startswith('\\'):
+            # "\ No newline at end of file" applies to the previous line
+            for side in last:
+                side[-1] = side[-1].rstrip('\n')
+            continue
+        text = line[1:] if line[:1] in ' +-' else line.lstrip(' ')
+        if not text.endswith('\n'):
+            text += '\n'
+        tag = line[:1]
+        if tag == '-':
+            hunk.old.append(text)
+            last = (hunk.old,)
+        elif tag == '+':
+            hunk.new.append(text)
+            last = (hunk.new,)
+        else:
+            hunk.old.append(text)
+            hunk.new.append(text)
+            last = (hunk.old, hunk.new)
+    return patches
+
+
+def _hunk_open(hunk):
+    return len(hunk.old) < hunk.old_count or len(hunk.new) < hunk.new_count
+
+
+def _locate(lines, block, expected, start):
+    """Find ``block`` in ``lines[start:]``, preferring ``expected``."""
+    size = len(block)
+    if lines[expected:expected + size] == block and expected >= start:
+        return expected
+    best = None
+    for pos in range(start, len(lines) - size + 1):
+        if best is not None and pos - expected >= abs(best - expected):
+            break
+        if lines[pos:pos + size] == block and (best is None or abs(pos - expected) < abs(best - expected)):
+            best = pos
+    return best
+
+
+def apply_hunks(content, hunks, path='<input>'):
+    """Apply ``hunks`` (in file order) to ``content`` in a single pass."""
+    lines = content.splitlines(keepends=True)
+    out = []
+    cursor = 0
+    offset = 0
+    for hunk in hunks:
+        # Pure insertions (old count 0) name the line they follow
+        base = hunk.old_start - 1 if hunk.old else hunk.old_start
+        pos = _locate(lines, hunk.old, max(base + offset, cursor), cursor)
+        if pos is None:
+            raise PatchError(f"{path}: hunk at line {hunk.old_start} does not apply")
+        out.extend(lines[cursor:pos])
+        out.extend(hunk.new)
+        cursor = pos + len(hunk.old)
+        offset = pos - base
+    out.extend(lines[cursor:])
+    return ''.join(out)
+
+
+def apply_patch(lines, root='.', strip=1, check=False):
+    """Apply a multi-file patch under ``root``.
+
+    Every file is patched in memory first; files are only written (each
+    atomically) once all of them applied cleanly, and the migrations named
+    by their headers recorded. With ``check=True`` nothing is written.
+    Returns the list of patched paths.
+    """
+    results = {}
+    # path -> (checkout root, [migration ID, ...])
+    migrations = {}
+    for patch in parse_patch(lines, strip):
+        path = os.path.join(root, patch.path)
+        if path in results:
+            # Later patches for the same file apply on top of earlier ones
+            before = results[path][1]
+            current = results[path][2]
+        elif patch.old_path is None:
+            before = current = ''
+        else:
+            before = current = read_file(os.path.join(root, patch.old_path))
+        after = apply_hunks(current, patch.hunks, patch.path)
+        results[path] = (patch, before, after)
+        if patch.migrations is not None:
+            target, names = patch.migrations
+            migrations.setdefault(path, (_checkout_root(path, target), []))[1].extend(names)
+
+    if not check:
+        for path, (patch, before, after) in results.items():
+            if patch.new_path is None:
+                os.remove(path)
+            elif patch.old_path is None:
+                os.makedirs(os.path.dirname(path) or '.', exist_ok=True)
+                write_file(path, after)
+            else:
+                update_file(path, before, after)
+        _record_migrations(results, migrations)
+    return list(results)
+
+
+def _checkout_root(path, target):
+    """The checkout holding ``path``, the file of migration target ``target``."""
+    normalized = os.path.normpath(path).replace(os.sep, '/')
+    if normalized != target and not normalized.endswith('/' + target):
+        raise PatchError(f"{path}: migrations header is for {target}")
+    return normalized[:len(normalized) - len(target)] or '.'
+
+
+def _record_migrations(results, migrations):
+    """Record ``migrations`` in the journals of their checkouts."""
+    journals = {}
+    for path, (root, names) in migrations.items():
+        if root not in journals:
+            journals[root] = Journal.for_root(root)
+        _, before, after = results[path]
+        journals[root].record(path, before, names, after)
+    for journal in journals.values():
+        journal.save()
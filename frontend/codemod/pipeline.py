@@ -0,0 +1,126 @@
+"""Run ordered in-memory stages over a single file buffer."""
+import os
+import stat
+import time
+from collections import namedtuple
+from contextlib import contextmanager
+
+from codemod import metrics
+
+# name: label used in timing reports
+# transform: callable taking the file content and returning the new content
+# triggers: text the stage looks for, used by watch mode to skip it when an
+#           edit touches none of it (see codemod/watch.py); None: always run
+Stage = namedtuple('Stage', ['name', 'transform', 'triggers'], defaults=[None])
+
+
+def read_file(path):
+    with open(path, 'r', encoding='utf-8') as f:
+        return f.read()
+
+
+@contextmanager
+def atomic_write(path, binary=False):
+    """Yield a text (or with ``binary``, bytes) stream whose content
+    replaces ``path`` atomically.
+
+    The content goes to a temporary file in the same directory which is
+    renamed over ``path`` when the block exits, so watchers (e.g. the
+    Next.js dev server) never see a half-written file. If the block raises,
+    ``path`` is left alone. (Plain ``os`` calls rather than tempfile and
+    shutil, which would double the import time of per-file runs.)
+    """
+    directory, name = os.path.split(os.path.abspath(path))
+    tmp = os.path.join(directory, f'.{name}.{os.getpid()}.tmp')
+    fd = os.open(tmp, os.O_WRONLY | os.O_CREAT | os.O_TRUNC, 0o666)
+    try:
+        with (os.fdopen(fd, 'wb') if binary else os.fdopen(fd, 'w', encoding='utf-8')) as f:
+            yield f
+        if os.path.exists(path):
+            os.chmod(tmp, stat.S_IMODE(os.stat(path).st_mode))
+        os.replace(tmp, path)
+    except BaseException:
+        try:
+            os.unlink(tmp)
+        except OSError:
+            pass
+        raise
+
+
+def write_file(path, content):
+    """Replace ``path`` with ``content`` atomically."""
+    with atomic_write(path) as f:
+        f.write(content)
+
+
+def update_file(path, original, content):
+    """Write ``content`` only if it differs from ``original``.
+
+    Leaving untouched files alone keeps their mtime, so dev servers do not
+    rebuild for no-op runs. Returns True if the file was written.
+    """
+    if content == original:
+        return False
+    write_file(path, content)
+    return True
+
+
+def run_stages(content, stages):
+    """Apply ``stages`` to ``content`` in order.
+
+    Returns ``(content, timings, applied)`` where ``timings`` is a list of
+    ``(stage name, seconds)`` tuples and ``applied`` lists the names of the
+    stages that changed the content.
+    """
+    timings = []
+    applied = []
+    for stage in stages:
+        start = time.perf_counter()
+        with metrics.context(stage=stage.name):
+            result = stage.transform(content)
+        timings.append((stage.name, time.perf_counter() - start))
+        if result != content:
+            applied.append(stage.name)
+        content = result
+    return content, timings, applied
+
+
+def process_file(path, stages, journal=None):
+    """Run ``stages`` over ``path`` without writing anything.
+
+    With a :class:`codemod.journal.Journal`, only the stages it lists as
+    pending for the file run. Returns ``(original, content, timings,
+    applied)`` as for :func:`run_stages`.
+    """
+    original = read_file(path)
+    if journal is not None:
+        stages = journal.pending(path, stages, original)
+    with metrics.context(file=path):
+        content, timings, applied = run_stages(original, stages)
+    return original, content, timings, applied
+
+
+def run_file(path, stages, cache=None, journal=None):
+    """Read ``path`` once, run every stage over it and write it back once,
+    if anything changed.
+
+    Returns ``(timings, changed)``. With a :class:`codemod.cache.FileCache`,
+    files unchanged since their last run with the same stages are skipped
+    and ``None`` is returned. With a :class:`codemod.journal.Journal`, only
+    pending stages run (``timings`` is empty if there were none) and the
+    ones that changed the file are recorded as applied; one that found
+    nothing to do stays pending.
+    """
+    if cache is not None:
+        version = cache.version(stages)
+        if cache.is_fresh(path, version):
+            return None
+
+    original, content, timings, applied = process_file(path, stages, journal)
+    changed = update_file(path, original, content)
+    if journal is not None:
+        journal.record(path, original, applied, content)
+
+    if cache is not None:
+        cache.record(path, version, content)
+    return timings, changed
@@ -0,0 +1,134 @@
+"""Literal find/replace rules applied from one search per string.
+
+Every ``find`` string and every guard string of a :class:`RuleSet` is
+looked up once with ``str.find``, which runs at C speed, and the rules are
+then applied together in a single splice of the file, so a set costs one
+write of the buffer however many rules it holds.
+
+Semantics match running ``content.replace(find, replace)`` for each rule,
+wrapped in ``if guard not in content`` checks, with two differences worth
+knowing about:
+
+* guards are evaluated against the input buffer, not against the output of
+  earlier rules in the same set;
+* when matches of different rules overlap, the leftmost one wins, then the
+  longest. Rules that must see each other's output belong in separate sets
+  (or separate pipeline stages).
+"""
+import time
+from collections import namedtuple
+
+from codemod import metrics
+
+# name: label used in reports
+# find: literal text to look for
+# replace: text substituted for every non-overlapping match
+# unless: guard strings; the rule is skipped if any of them is in the file
+Rule = namedtuple('Rule', ['name', 'find', 'replace', 'unless'], defaults=[()])
+
+
+def find_all(text, pattern):
+    """Start offsets of every occurrence of ``pattern``, overlaps included."""
+    starts = []
+    find = text.find
+    pos = find(pattern)
+    while pos >= 0:
+        starts.append(pos)
+        pos = find(pattern, pos + 1)
+    return starts
+
+
+class RuleSet:
+    """A compiled group of :class:`Rule` objects."""
+
+    def __init__(self, rules):
+        self.rules = list(rules)
+        # Every find and guard string, once each
+        self.patterns = []
+        self._index = {}
+        for rule in self.rules:
+            for text in (rule.find,) + tuple(rule.unless):
+                if not text:
+                    raise ValueError('Empty patterns are not supported')
+                if text not in self._index:
+                    self._index[text] = len(self.patterns)
+                    self.patterns.append(text)
+
+    def compiled(self):
+        """Return the rules and pattern index as plain tuples, lists and
+        dicts that :mod:`marshal` can store (see :mod:`codemod.pack`)."""
+        rules = [(rule.name, rule.find, rule.replace, tuple(rule.unless)) for rule in self.rules]
+        return rules, self._index, self.patterns
+
+    @classmethod
+    def from_compiled(cls, data):
+        """Rebuild a rule set from :meth:`compiled`."""
+        rules, index, patterns = data
+        ruleset = cls.__new__(cls)
+        ruleset.rules = [Rule(*rule) for rule in rules]
+        ruleset._index = index
+        ruleset.patterns = patterns
+        return ruleset
+
+    def scan(self, content):
+        """Return ``(matches, found)`` for ``content``.
+
+        ``matches`` maps pattern index to match start offsets and ``found``
+        is the set of pattern indexes seen at least once.
+        """
+        matches = {}
+        for pid, pattern in enumerate(self.patterns):
+            starts = find_all(content, pattern)
+            if starts:
+                matches[pid] = starts
+        return matches, set(matches)
+
+    def apply(self, content):
+        """Apply every rule to ``content``.
+
+        Returns ``(content, hits)`` where ``hits`` maps rule name to the
+        number of replacements made (0 for rules skipped by a guard). The
+        shared scan is reported to :mod:`codemod.metrics` as rule
+        ``'<scan>'``, followed by one record per rule.
+        """
+        start = time.perf_counter()
+        matches, found = self.scan(content)
+        metrics.emit('<scan>', sum(len(m) for m in matches.values()),
+                     time.perf_counter() - start, bytes_scanned=len(content))
+
+        start = time.perf_counter()
+        hits = {rule.name: 0 for rule in self.rules}
+        skipped = set()
+        candidates = []
+        for order, rule in enumerate(self.rules):
+            if any(self._index[guard] in found for guard in rule.unless):
+                skipped.add(rule.name)
+                continue
+            for pos in matches.get(self._index[rule.find], ()):
+                candidates.append((pos, -len(rule.find), order))
+
+        # Leftmost, then longest, then first-declared match wins
+        candidates.sort()
+        pieces = []
+        pos = 0
+        for match_start, neg_length, order in candidates:
+            if match_start < pos:
+                continue
+            rule = self.rules[order]
+            pieces.append(content[pos:match_start])
+            pieces.append(rule.replace)
+            pos = match_start - neg_length
+            hits[rule.name] += 1
+        if pieces:
+            pieces.append(content[pos:])
+            content = ''.join(pieces)
+
+        if metrics.enabled():
+            # Splicing is shared too; split its (small) cost by matches
+            elapsed = time.perf_counter() - start
+            total = sum(hits.values()) or 1
+            for rule in self.rules:
+                metrics.emit(rule.name, hits[rule.name], elapsed * hits[rule.name] / total,
+                             bytes_replaced=hits[rule.name] * len(rule.find),
+                             skipped_by_guard=rule.name in skipped)
+        return content, hits
@@ -0,0 +1,97 @@
+"""Migration stages described as data.
+
+A stage's transform is a list of steps run in order over the buffer. Being
+plain tuples of strings and compiled rule sets, steps can be written to a
+rule pack (see :mod:`codemod.pack`) and run without importing the scripts
+that define them.
+
+    ('rules', ruleset)
+        apply a :class:`codemod.rules.RuleSet`
+    ('reformatted', name, rule, block, replacement)
+        if ``rule`` made no replacement, replace ``block`` ignoring
+        whitespace and indentation
+    ('regenerate', name, retry, options, fragment)
+        if the ``retry`` step ran and missed but ``options`` is found,
+        regenerate the crop dropdowns from ``fragment``
+    ('imports', name, [(local name, module, default, after module), ...])
+        add missing imports; a default import is skipped if its local name
+        is imported from anywhere, a named one if imported from ``module``
+    ('regex', name, pattern, replacement)
+        ``re.subn`` over the whole buffer
+"""
+import re
+
+from codemod import metrics
+from codemod.crops import rewrite_dropdowns
+from codemod.imports import ImportBlock
+from codemod.tokens import TokenIndex
+
+
+def run_steps(content, steps):
+    """Run ``steps`` over ``content``.
+
+    Returns ``(content, hits)``. ``hits`` maps rule and step names to their
+    number of matches, or to the list of names added for import steps.
+    Steps that did not run (a retry after a match) have no entry.
+    """
+    hits = {}
+    # Token index of the current buffer, shared by retries
+    index = None
+    for step in steps:
+        kind = step[0]
+        if kind == 'rules':
+            content, step_hits = step[1].apply(content)
+            hits.update(step_hits)
+        elif kind == 'reformatted':
+            _, name, rule, block, replacement = step
+            if hits.get(rule):
+                continue
+            with metrics.rule(name, bytes_scanned=len(content)) as m:
+                index = TokenIndex(content)
+                updated = index.replace(block, replacement)
+                m.matches = int(updated is not None)
+                m.bytes_replaced = len(block) if m.matches else 0
+            hits[name] = m.matches
+            if updated is not None:
+                content = updated
+                index = None
+        elif kind == 'regenerate':
+            _, name, retry, options, fragment = step
+            if hits.get(retry, 1):
+                continue
+            if index is None or index.content is not content:
+                index = TokenIndex(content)
+            if index.find(options) is None:
+                continue
+            with metrics.rule(name, bytes_scanned=len(content)) as m:
+                content, m.matches, m.bytes_replaced = rewrite_dropdowns(content, fragment)
+            hits[name] = m.matches
+            index = None
+        elif kind == 'imports':
+            _, name, specs = step
+            with metrics.rule(name) as m:
+                block = ImportBlock(content)
+                m.bytes_scanned = block.header_end
+                added = []
+                for local, module, default, after in specs:
+                    if default and block.has(local):
+                        continue
+                    if block.add(local, module, default=default, after=after):
+                        added.append(local)
+                m.matches = len(added)
+                m.bytes_replaced = block.replaced()
+            hits[name] = added
+            if added:
+                content = block.render()
+        elif kind == 'regex':
+            _, name, pattern, replacement = step
+            if isinstance(pattern, str):
+                pattern = re.compile(pattern)
+            with metrics.rule(name, bytes_scanned=len(content)) as m:
+                new_content, m.matches = pattern.subn(replacement, content)
+                m.bytes_replaced = len(content) - len(new_content) + m.matches * len(replacement)
+            hits[name] = m.matches
+            content = new_content
+        else:
+            raise ValueError(f"Unknown step kind: {kind!r}")
+    return content, hits
@@ -0,0 +1,109 @@
+"""Bounded-memory rewriting of files too large to load at once.
+
+The input is read in chunks and the output written as it is produced, to a
+temporary file renamed over the input at the end. Text is only committed up
+to a point no pending match can span: for regexes, the window carried over
+to the next chunk is as long as the longest possible match, so patterns
+used here must have a bounded match length. Results are identical to
+rewriting the whole file in memory.
+"""
+from codemod.crops import replace_dropdowns
+from codemod.pipeline import atomic_write
+
+CHUNK_SIZE = 1 << 20
+SELECT_OPEN = '<select'
+SELECT_CLOSE = '</select>'
+
+
+class _Unchanged(Exception):
+    pass
+
+
+def stream_sub(pattern, repl, src, dst, max_match, chunk_size=CHUNK_SIZE):
+    """Copy ``src`` to ``dst`` replacing matches of ``pattern`` with ``repl``.
+
+    Works like ``pattern.subn(repl, src.read())``, provided no match is
+    longer than ``max_match`` characters. Returns the number of matches.
+    """
+    count = 0
+    buf = ''
+    eof = False
+    while not eof:
+        chunk = src.read(chunk_size)
+        eof = not chunk
+        buf += chunk
+        # Matches starting before limit are known to end inside buf
+        limit = len(buf) if eof else len(buf) - max_match
+        if limit <= 0:
+            continue
+        pos = 0
+        for match in pattern.finditer(buf):
+            if match.start() >= limit:
+                break
+            dst.write(buf[pos:match.start()])
+            dst.write(repl(match) if callable(repl) else match.expand(repl))
+            pos = match.end()
+            count += 1
+        cut = max(pos, limit)
+        dst.write(buf[pos:cut])
+        buf = buf[cut:]
+    return count
+
+
+def _select_cut(buf):
+    """Last line start of ``buf`` that is not inside a ``<select>`` element.
+
+    A select extends to the next ``</select>``. Cutting at a line start
+    keeps a select's indentation, which replace_dropdowns() copies, in the
+    same chunk as the select; when that line start falls inside an earlier
+    select (one closing on the same line), the cut moves before that one.
+    """
+    # Keep a possibly split "<select" for the next chunk
+    cut = buf.rfind('\n', 0, max(len(buf) - len(SELECT_OPEN) + 1, 0)) + 1
+    while cut:
+        close = buf.rfind(SELECT_CLOSE, 0, cut)
+        start = buf.find(SELECT_OPEN, close + len(SELECT_CLOSE) if close != -1 else 0, cut)
+        if start == -1:
+            break
+        cut = buf.rfind('\n', 0, start) + 1
+    return cut
+
+
+def stream_dropdowns(fragment, src, dst, chunk_size=CHUNK_SIZE):
+    """Copy ``src`` to ``dst`` through :func:`codemod.crops.replace_dropdowns`.
+
+    Chunks are only cut at line starts outside ``<select>`` elements, so
+    memory is bounded by the chunk size plus the largest select (and its
+    line). Returns the number of selects updated.
+    """
+    count = 0
+    buf = ''
+    eof = False
+    while not eof:
+        chunk = src.read(chunk_size)
+        eof = not chunk
+        buf += chunk
+        cut = len(buf) if eof else _select_cut(buf)
+        if not cut:
+            continue
+        content, updated = replace_dropdowns(buf[:cut], fragment)
+        dst.write(content)
+        count += updated
+        buf = buf[cut:]
+    return count
+
+
+def stream_file(path, rewrite):
+    """Rewrite ``path`` with ``rewrite(src, dst)``, which returns a match count.
+
+    The file is replaced atomically, and only if something matched. Returns
+    the count.
+    """
+    try:
+        with open(path, 'r', encoding='utf-8') as src, atomic_write(path) as dst:
+            count = rewrite(src, dst)
+            if not count:
+                raise _Unchanged
+    except _Unchanged:
+        return 0
+    return count
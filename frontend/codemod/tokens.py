@@ -0,0 +1,137 @@
+"""Whitespace-insensitive block matching for TSX sources.
+
+The file is tokenized once into identifier/number runs and single
+punctuation characters; whitespace is dropped. A :class:`TokenIndex` maps
+each token to its positions so a block lookup only checks the positions of
+the block's rarest token instead of rescanning the file. The index is only
+built once a lookup passes two cheap checks (every identifier of the block
+occurs in the file, and the block is a substring of the file once all
+whitespace is removed), so a miss usually costs a few substring searches.
+"""
+import re
+
+TOKEN_RE = re.compile(r'[A-Za-z0-9_$]+|\S')
+
+
+def tokenize(text):
+    """Return ``(tokens, starts, ends)`` for ``text``."""
+    tokens, starts, ends = [], [], []
+    for match in TOKEN_RE.finditer(text):
+        tokens.append(match.group())
+        starts.append(match.start())
+        ends.append(match.end())
+    return tokens, starts, ends
+
+
+def line_indent(text, offset):
+    """Return ``(line start, indent)`` if only whitespace precedes ``offset``
+    on its line, else ``(None, None)``."""
+    line_start = text.rfind('\n', 0, offset) + 1
+    prefix = text[line_start:offset]
+    if prefix.strip(' \t'):
+        return None, None
+    return line_start, prefix
+
+
+def reindent(text, shift, first_line=True):
+    """Shift every line of ``text`` by ``shift`` columns.
+
+    With ``first_line=False`` the text before the first newline is left
+    alone, for blocks that continue a line already in the file.
+    """
+    if not shift:
+        return text
+    lines = text.split('\n')
+    for i, line in enumerate(lines):
+        if not line.strip() or (i == 0 and not first_line):
+            continue
+        if shift > 0:
+            lines[i] = ' ' * shift + line
+        else:
+            stripped = line.lstrip(' ')
+            lines[i] = line[min(-shift, len(line) - len(stripped)):]
+    return '\n'.join(lines)
+
+
+class TokenIndex:
+    """Token positions of one file buffer."""
+
+    def __init__(self, content):
+        self.content = content
+        self.positions = None
+        # content without whitespace, for the pre-check
+        self.squashed = None
+
+    def _build(self):
+        self.tokens, self.starts, self.ends = tokenize(self.content)
+        self.positions = {}
+        for i, token in enumerate(self.tokens):
+            self.positions.setdefault(token, []).append(i)
+
+    def find(self, block, start=0):
+        """Return the ``(start, end)`` character span of the first match of
+        ``block`` at or after token ``start``, ignoring whitespace."""
+        needle = tokenize(block)[0]
+        first = self._find_tokens(needle, start)
+        if first is None:
+            return None
+        return self.starts[first], self.ends[first + len(needle) - 1]
+
+    def _find_tokens(self, needle, start=0):
+        if not needle:
+            return None
+        if self.positions is None:
+            if not all(token in self.content for token in set(needle) if len(token) > 1):
+                return None
+            if self.squashed is None:
+                self.squashed = ''.join(self.content.split())
+            if ''.join(needle) not in self.squashed:
+                return None
+            self._build()
+        # Anchor on the needle token with the fewest occurrences in the file
+        anchor = min(range(len(needle)), key=lambda k: len(self.positions.get(needle[k], ())))
+        size = len(needle)
+        for pos in self.positions.get(needle[anchor], ()):
+            first = pos - anchor
+            if first < start:
+                continue
+            if self.tokens[first:first + size] == needle:
+                return first
+        return None
+
+    def replace(self, block, replacement):
+        """Replace the first whitespace-insensitive match of ``block``.
+
+        The replacement is re-indented by the difference between the
+        indentation ``block`` was written with and the indentation found in
+        the file. Returns the new content, or ``None`` if there is no match.
+        """
+        needle, needle_starts, _ = tokenize(block)
+        first = self._find_tokens(needle)
+        if first is None:
+            return None
+        span_start = self.starts[first]
+        span_end = self.ends[first + len(needle) - 1]
+
+        # Compare indentation on the first token that starts a line in the
+        # block (the opening token counts only if the block includes its
+        # indentation)
+        leading_space = block[:1].isspace()
+        shift = 0
+        for k, offset in enumerate(needle_starts):
+            _, block_indent = line_indent(block, offset)
+            if block_indent is None or (k == 0 and not leading_space):
+                continue
+            _, file_indent = line_indent(self.content, self.starts[first + k])
+            if file_indent is not None:
+                shift = len(file_indent) - len(block_indent)
+            break
+
+        replacement = reindent(replacement, shift, first_line=leading_space)
+        if leading_space:
+            line_start, _ = line_indent(self.content, span_start)
+            if line_start is not None:
+                span_start = line_start
+            else:
+                replacement = replacement.lstrip(' \t')
+        return self.content[:span_start] + replacement + self.content[span_end:]
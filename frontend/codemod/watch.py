@@ -0,0 +1,307 @@
+"""Incremental re-runs of the migrations while files are being edited.
+
+A watcher reports target files that changed on disk, through inotify where
+the platform has it and by polling their stat otherwise. Each change is
+compared with the buffer the previous run left behind (kept in a small LRU
+cache).
+
+The file's migration journal (see :mod:`codemod.journal`) decides which
+stages are eligible: applied ones never run again. Of the pending stages,
+only those whose triggers occur a different number of times around the
+edit run. Triggers are the literal blocks a stage looks for; they are
+counted both as written and with all whitespace removed, so re-indenting
+or re-wrapping a block still counts as touching it. What earlier stages
+rewrote counts as part of the edit for the stages after them. A stage
+that has just become pending again (the file was reverted) runs whatever
+the edit.
+
+Stage selection only looks at the lines around the edit; ``run_migrations.py``
+remains the authoritative full run.
+"""
+import ctypes
+import ctypes.util
+import os
+import select
+import struct
+import time
+
+from codemod import metrics
+from codemod.patch import changed_region
+from codemod.pipeline import read_file, run_stages, update_file
+
+# Quiet period that ends a burst of saves
+DEBOUNCE = 0.02
+POLL_INTERVAL = 0.05
+MAX_BUFFERS = 64
+# Lines of context around an edit, beyond the height of each trigger
+CONTEXT_LINES = 2
+
+IN_CLOSE_WRITE = 0x00000008
+IN_MOVED_TO = 0x00000080
+IN_Q_OVERFLOW = 0x00004000
+EVENT_HEADER = struct.Struct('iIII')
+
+
+def _normalize(text):
+    return ''.join(text.split())
+
+
+def around(text, start, end, context=CONTEXT_LINES):
+    """Return the lines of ``text`` touching ``[start, end)``, plus
+    ``context`` lines on either side."""
+    lo = text.rfind('\n', 0, start) + 1
+    for _ in range(context):
+        if lo:
+            lo = text.rfind('\n', 0, lo - 1) + 1
+    hi = text.find('\n', end)
+    for _ in range(context):
+        if hi == -1:
+            break
+        hi = text.find('\n', hi + 1)
+    return text[lo:] if hi == -1 else text[lo:hi]
+
+
+class BufferCache:
+    """Least-recently-used map of path -> buffer left by the last run."""
+
+    def __init__(self, max_entries=MAX_BUFFERS):
+        self.max_entries = max_entries
+        self.buffers = {}
+
+    def get(self, path):
+        content = self.buffers.pop(path, None)
+        if content is not None:
+            # Re-insert so dict order doubles as recency order
+            self.buffers[path] = content
+        return content
+
+    def put(self, path, content):
+        self.buffers.pop(path, None)
+        self.buffers[path] = content
+        while len(self.buffers) > self.max_entries:
+            del self.buffers[next(iter(self.buffers))]
+
+
+class IncrementalRunner:
+    """Re-run the pending stages of changed targets, skipping unaffected ones.
+
+    ``targets`` maps file paths to stage lists and ``journals`` maps the
+    same paths to the :class:`codemod.journal.Journal` listing which of
+    their stages are pending; it is saved after each run. Pending stages
+    with ``triggers`` set to ``None`` always run, as does every pending
+    stage when ``full`` is True.
+    """
+
+    def __init__(self, targets, journals, full=False, buffers=None):
+        self.targets = {os.path.abspath(path): stages for path, stages in targets.items()}
+        self.journals = {os.path.abspath(path): journal for path, journal in journals.items()}
+        self.full = full
+        self.buffers = buffers if buffers is not None else BufferCache()
+        # path -> names of the stages pending after its last run
+        self.pending = {}
+        # stage name -> [(trigger, trigger without whitespace, context lines)]
+        self.triggers = {}
+        for stages in self.targets.values():
+            for stage in stages:
+                if stage.triggers is not None and stage.name not in self.triggers:
+                    self.triggers[stage.name] = [
+                        (trigger, _normalize(trigger), trigger.count('\n') + CONTEXT_LINES)
+                        for trigger in stage.triggers
+                    ]
+
+    def _touched(self, stage, previous, content, region):
+        """True if the edit ``region`` adds or removes an occurrence of one
+        of the triggers of ``stage``."""
+        if region is None or self.full or stage.triggers is None:
+            return True
+        start, old_end, new_end = region
+        windows = {}
+        for trigger, normalized, context in self.triggers[stage.name]:
+            if context not in windows:
+                old = around(previous, start, old_end, context)
+                new = around(content, start, new_end, context)
+                windows[context] = (old, new, _normalize(old), _normalize(new))
+            old, new, old_normalized, new_normalized = windows[context]
+            if old.count(trigger) != new.count(trigger):
+                return True
+            if old_normalized.count(normalized) != new_normalized.count(normalized):
+                return True
+        return False
+
+    def update(self, path):
+        """Bring ``path`` up to date.
+
+        Returns ``(timings, changed)`` for the stages that ran, or ``None``
+        if the file is gone or holds what the last run left in it (such as
+        the echo of our own write).
+        """
+        path = os.path.abspath(path)
+        try:
+            content = read_file(path)
+        except OSError:
+            return None
+        previous = self.buffers.get(path)
+        if content == previous:
+            return None
+
+        region = None if previous is None else changed_region(previous, content)
+
+        journal = self.journals[path]
+        stages = journal.pending(path, self.targets[path], content)
+        was_pending = self.pending.get(path, set())
+
+        timings = []
+        applied = []
+        result = content
+        with metrics.context(file=path):
+            for stage in stages:
+                if stage.name in was_pending and not self._touched(stage, previous, result, region):
+                    continue
+                result, stage_timings, stage_applied = run_stages(result, [stage])
+                timings.extend(stage_timings)
+                applied.extend(stage_applied)
+                if stage_applied and previous is not None:
+                    # Later stages may look for what this one wrote
+                    region = changed_region(previous, result)
+
+        # Leave the file alone if it was saved again while we worked; that
+        # save has its own event queued
+        try:
+            if read_file(path) != content:
+                return None
+        except OSError:
+            return None
+        changed = update_file(path, content, result)
+        self.buffers.put(path, result)
+        journal.record(path, content, applied, result)
+        journal.save()
+        self.pending[path] = {stage.name for stage in stages if stage.name not in applied}
+        return timings, changed
+
+
+class PollingWatcher:
+    """Report changed files by comparing their size and mtime."""
+
+    def __init__(self, paths, interval=POLL_INTERVAL):
+        self.interval = interval
+        self.stats = {os.path.abspath(path): None for path in paths}
+        for path in self.stats:
+            self.stats[path] = self._stat(path)
+
+    @staticmethod
+    def _stat(path):
+        try:
+            st = os.stat(path)
+        except OSError:
+            return None
+        return st.st_size, st.st_mtime_ns
+
+    def wait(self, timeout=None):
+        """Return the set of paths changed since the last call, waiting up
+        to ``timeout`` seconds (forever if ``None``) for the first one."""
+        deadline = None if timeout is None else time.monotonic() + timeout
+        while True:
+            changed = set()
+            for path, old in self.stats.items():
+                new = self._stat(path)
+                if new != old:
+                    self.stats[path] = new
+                    changed.add(path)
+            if changed:
+                return changed
+            if deadline is None:
+                time.sleep(self.interval)
+                continue
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                return changed
+            time.sleep(min(self.interval, remaining))
+
+    def close(self):
+        pass
+
+
+class InotifyWatcher:
+    """Report changed files from inotify events on their directories.
+
+    Directories are watched rather than files, so editors that save by
+    renaming a new file over the old one are seen too.
+    """
+
+    def __init__(self, paths):
+        libc = ctypes.CDLL(ctypes.util.find_library('c'), use_errno=True)
+        # AttributeError off Linux, where libc has no inotify
+        self.fd = libc.inotify_init1(os.O_NONBLOCK | os.O_CLOEXEC)
+        if self.fd < 0:
+            raise OSError(ctypes.get_errno(), 'inotify_init1 failed')
+        self.paths = {os.path.abspath(path) for path in paths}
+        self.directories = {}
+        try:
+            for directory in {os.path.dirname(path) for path in self.paths}:
+                wd = libc.inotify_add_watch(self.fd, os.fsencode(directory), IN_CLOSE_WRITE | IN_MOVED_TO)
+                if wd < 0:
+                    raise OSError(ctypes.get_errno(), f'inotify_add_watch failed for {directory}')
+                self.directories[wd] = directory
+        except OSError:
+            os.close(self.fd)
+            raise
+
+    def wait(self, timeout=None):
+        """Return the set of paths changed since the last call, waiting up
+        to ``timeout`` seconds (forever if ``None``) for the first one."""
+        ready, _, _ = select.select([self.fd], [], [], timeout)
+        if not ready:
+            return set()
+        changed = set()
+        while True:
+            try:
+                data = os.read(self.fd, 64 * 1024)
+            except BlockingIOError:
+                return changed
+            offset = 0
+            while offset < len(data):
+                wd, mask, _, size = EVENT_HEADER.unpack_from(data, offset)
+                offset += EVENT_HEADER.size
+                name = data[offset:offset + size].rstrip(b'\0')
+                offset += size
+                if mask & IN_Q_OVERFLOW:
+                    # Events were dropped: assume everything changed
+                    changed |= self.paths
+                elif wd in self.directories:
+                    path = os.path.join(self.directories[wd], os.fsdecode(name))
+                    if path in self.paths:
+                        changed.add(path)
+
+    def close(self):
+        os.close(self.fd)
+
+
+def make_watcher(paths, poll=False, interval=POLL_INTERVAL):
+    """Return an :class:`InotifyWatcher` if possible, else a :class:`PollingWatcher`."""
+    if not poll:
+        try:
+            return InotifyWatcher(paths)
+        except (OSError, AttributeError, TypeError):
+            pass
+    return PollingWatcher(paths, interval)
+
+
+def watch(update, watcher, report, debounce=DEBOUNCE):
+    """Call ``update(path)`` as ``watcher`` reports changes, until interrupted.
+
+    Saves less than ``debounce`` seconds apart are handled as one batch.
+    ``report(path, result, seconds)`` is called after every update, with
+    ``result`` as returned by ``update`` (usually
+    :meth:`IncrementalRunner.update`).
+    """
+    while True:
+        pending = watcher.wait()
+        while True:
+            more = watcher.wait(debounce)
+            if not more:
+                break
+            pending |= more
+        for path in sorted(pending):
+            start = time.perf_counter()
+            result = update(path)
+            report(path, result, time.perf_counter() - start)
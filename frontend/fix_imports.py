@@ -1,35 +1,36 @@
 #!/usr/bin/env python3
+from codemod.journal import run_migration
+from codemod.pipeline import Stage
+from codemod.steps import run_steps
 
-# Read the file
-with open('app/farmer/page.tsx', 'r') as f:
-    lines = f.readlines()
-
-# Check if imports already exist
-has_harvest_form = any('CreateHarvestNFTForm' in line for line in lines[:20])
-has_my_nfts = any('MyHarvestNFTs' in line for line in lines[:20])
-
-if has_harvest_form and has_my_nfts:
-    print("✅ All imports already exist!")
-else:
-    # Find the line after hbarUtils import to add new imports
-    insert_index = -1
-    for i, line in enumerate(lines):
-        if 'hbarUtils' in line:
-            insert_index = i + 1
-            break
-    
-    if insert_index > 0:
-        if not has_harvest_form:
-            lines.insert(insert_index, "import CreateHarvestNFTForm from '@/components/CreateHarvestNFTForm'\n")
-            insert_index += 1
-            print("✅ Added CreateHarvestNFTForm import")
-        
-        if not has_my_nfts:
-            lines.insert(insert_index, "import MyHarvestNFTs from '@/components/MyHarvestNFTs'\n")
-            print("✅ Added MyHarvestNFTs import")
-
-# Write back
-with open('app/farmer/page.tsx', 'w') as f:
-    f.writelines(lines)
-
-print("✅ Imports fixed!")
+TARGET = 'app/farmer/page.tsx'
+
+# (component, module) default imports the farmer page needs
+REQUIRED_IMPORTS = [
+    ('CreateHarvestNFTForm', '@/components/CreateHarvestNFTForm'),
+    ('MyHarvestNFTs', '@/components/MyHarvestNFTs'),
+]
+# Add new imports after the hbarUtils import
+STEPS = [('imports', 'component_imports',
+          [(name, module, True, '@/lib/hbarUtils') for name, module in REQUIRED_IMPORTS])]
+# While this stage is pending, watch mode re-runs it only for edits near one
+# of these (see codemod/watch.py)
+TRIGGERS = ('import',) + tuple(name for name, _ in REQUIRED_IMPORTS)
+
+
+def transform(content):
+    content, hits = run_steps(content, STEPS)
+    added = hits['component_imports']
+
+    if not added:
+        print("✅ All imports already exist!")
+    for name in added:
+        print(f"✅ Added {name} import")
+    return content
+
+
+if __name__ == '__main__':
+    _, changed = run_migration(TARGET, Stage('fix_imports', transform))
+
+    if changed:
+        print("✅ Imports fixed!")
@@ -1,36 +1,32 @@
 #!/usr/bin/env python3
+from codemod.journal import run_migration
+from codemod.pipeline import Stage
+from codemod.steps import run_steps
 
-# Read the file
-with open('app/farmer/page.tsx', 'r') as f:
-    content = f.read()
-
-# Find the lucide-react import line
-import_line_old = "import { Sprout, Plus, List, TrendingUp, DollarSign, Package, AlertCircle, CheckCircle2, Clock, Shield, Lock, ExternalLink } from 'lucide-react'"
-import_line_new = "import { Sprout, Plus, List, TrendingUp, DollarSign, Package, AlertCircle, CheckCircle2, Clock, Shield, Lock, ExternalLink, Wheat, X } from 'lucide-react'"
-
-# Check if Wheat is already imported
-if 'Wheat' in content.split('\n')[0:20]:
-    print("✅ Wheat already imported!")
-else:
-    # Replace the import line
-    if import_line_old in content:
-        content = content.replace(import_line_old, import_line_new)
-        print("✅ Added Wheat and X to imports")
+TARGET = 'app/farmer/page.tsx'
+
+# Icons the NFT tab uses from lucide-react
+ICONS = ['Wheat', 'X']
+# Merge missing icons into the lucide-react import
+STEPS = [('imports', 'lucide_icons', [(name, 'lucide-react', False, None) for name in ICONS])]
+# While this stage is pending, watch mode re-runs it only for edits near one
+# of these (see codemod/watch.py)
+TRIGGERS = ('import', 'lucide-react') + tuple(ICONS)
+
+
+def transform(content):
+    content, hits = run_steps(content, STEPS)
+    added = hits['lucide_icons']
+
+    if added:
+        print(f"✅ Added {' and '.join(added)} to imports")
     else:
-        # Try to find any lucide-react import and add Wheat
-        lines = content.split('\n')
-        for i, line in enumerate(lines):
-            if 'from \'lucide-react\'' in line or 'from "lucide-react"' in line:
-                # Add Wheat before the closing brace
-                if 'Wheat' not in line:
-                    line = line.replace(' } from', ', Wheat, X } from')
-                    lines[i] = line
-                    print(f"✅ Added Wheat to line {i+1}")
-                    break
-        content = '\n'.join(lines)
-
-# Write back
-with open('app/farmer/page.tsx', 'w') as f:
-    f.write(content)
-
-print("✅ Import fixed!")
+        print("✅ Wheat already imported!")
+    return content
+
+
+if __name__ == '__main__':
+    _, changed = run_migration(TARGET, Stage('fix_wheat_import', transform))
+
+    if changed:
+        print("✅ Import fixed!")
@@ -0,0 +1,75 @@
+#!/usr/bin/env python3
+"""Run the migrations of the given files only, for git hooks and editor saves.
+
+Usage: python3 migrate_file.py FILE ...
+
+Each FILE whose path ends with one of the migration targets (e.g.
+app/farmer/page.tsx) gets that target's stages; other files are ignored, so
+a hook can pass every staged file. Only migrations pending in the journal
+of the file's checkout run (see codemod/journal.py). Stages come from the
+rule pack written by ``run_migrations.py --build-pack`` (see
+codemod/pack.py). If the pack is missing or older than the scripts, the
+scripts are imported instead.
+
+Interpreter start-up dominates runs this small, so this script avoids
+argparse and only imports what a packed run needs.
+"""
+import os
+import sys
+
+from codemod import pack
+from codemod.pipeline import run_file
+
+
+def load_migrations():
+    migrations = pack.load()
+    if migrations is None:
+        print("ℹ️  Rule pack missing or stale, loading scripts (run: python3 run_migrations.py --build-pack)",
+              file=sys.stderr)
+        from run_migrations import MIGRATIONS
+        migrations = MIGRATIONS
+    return migrations
+
+
+def find_target(path, targets):
+    path = path.replace(os.sep, '/')
+    for target in targets:
+        if path == target or path.endswith('/' + target):
+            return target
+    return None
+
+
+def main(argv):
+    if not argv or argv[0] in ('-h', '--help'):
+        print(__doc__.strip())
+        return 0 if argv else 2
+
+    migrations = None
+    # checkout root -> journal
+    journals = {}
+    status = 0
+    for path in argv:
+        if migrations is None:
+            migrations = load_migrations()
+        target = find_target(path, migrations)
+        if target is None:
+            continue
+        if not os.path.exists(path):
+            print(f"⚠️  Skipping {path}: file not found")
+            status = 1
+            continue
+        root = path[:len(path) - len(target)] or '.'
+        if root not in journals:
+            # Imported here: json and hashlib are wasted on non-target files
+            from codemod.journal import Journal
+            journals[root] = Journal.for_root(root)
+        _, changed = run_file(path, migrations[target], journal=journals[root])
+        if changed:
+            print(f"✅ {path} migrated")
+    for journal in journals.values():
+        journal.save()
+    return status
+
+
+if __name__ == '__main__':
+    sys.exit(main(sys.argv[1:]))
@@ -0,0 +1,654 @@
+#!/usr/bin/env python3
+"""Portfolio summary of the harvest NFTs and loans for the dashboards.
+
+Usage: python3 nft_analytics.py [--dir DIR] [--json FILE | --from-log]
+                                [--loans FILE] [--out FILE]
+                                [--today YYYY-MM-DD] [--force]
+
+Reads the NFTRecords of data/nfts.json (or of the nft_store.py log, with
+--from-log) and the loans of lib/mockData.ts (or of a JSON list of loans in
+the same shape) and writes DIR/portfolio-summary.json, which /api/portfolio
+serves to the admin and investor dashboards:
+
+- estimatedValue and counts per cropType, per farmLocation and per both;
+  loan amounts per cropType and status;
+- yield per hectare (expectedYield / farmSize) per cropType;
+- active NFTs and open loans by harvestDate in the next 30, 60 and 90 days;
+- validation flags per record, e.g. a negative farmSize, a yield density
+  no crop reaches, or one far from its crop's: a log-density more than 3.5
+  robust z-scores (median and MAD) from the crop's median. Flags are
+  counted and the first flagged records listed.
+
+Each source is read once into columns, one array per field, and the summary
+is computed over whole columns: with NumPy when it is installed, else row by
+row in plain Python (same results, slower). The summary records the size and
+mtime of its sources and the day it is for; a run with neither changed
+exits without reading the sources.
+"""
+import argparse
+import datetime
+import json
+import math
+import os
+import re
+import sys
+import time
+from array import array
+
+from codemod.pipeline import atomic_write
+from nft_store import DATA_DIR, JSON_FILE, LOG_FILE
+
+try:
+    import numpy as np
+except ImportError:
+    # Optional: the fallback computes the same summary row by row
+    np = None
+
+SUMMARY_FILE = 'portfolio-summary.json'
+SUMMARY_FORMAT = 1
+LOANS_FILE = os.path.join('lib', 'mockData.ts')
+
+# Harvest exposure windows, in days from today
+WINDOWS = (30, 60, 90)
+# kg per hectare, far above record harvests of the catalog's field crops
+MAX_YIELD_PER_HECTARE = 100_000
+# Robust z-score (Iglewicz and Hoaglin) beyond which a yield density is an outlier
+OUTLIER_Z = 3.5
+# Crops with fewer valid yield densities are not checked for outliers
+MIN_OUTLIER_GROUP = 5
+# Flagged records listed in the summary; all of them are counted
+MAX_FLAGGED = 100
+
+# Flag names, by bit
+NFT_FLAGS = (
+    'negativeFarmSize',
+    'zeroFarmSize',
+    'missingFarmSize',
+    'negativeExpectedYield',
+    'negativeEstimatedValue',
+    'implausibleYieldDensity',
+    'yieldDensityOutlier',
+    'invalidHarvestDate',
+)
+LOAN_FLAGS = (
+    'invalidAmount',
+    'overfunded',
+    'harvestBeforeCreated',
+    'invalidHarvestDate',
+)
+# MockLoan.status values
+LOAN_STATUSES = ('Pending', 'Funded', 'Repaid', 'Defaulted')
+
+# Day number of a missing or unparseable date
+NO_DAY = -2 ** 31
+EPOCH_ORDINAL = datetime.date(1970, 1, 1).toordinal()
+
+# The mockLoans array literal, its object literals and their fields
+LOANS_ARRAY = re.compile(r'export\s+const\s+mockLoans\b[^=]*=\s*\[(.*?)^\]', re.S | re.M)
+LOAN_OBJECT = re.compile(r'\{([^{}]*)\}')
+LOAN_FIELD = re.compile(r'''^\s*(\w+)\s*:\s*('[^']*'|"[^"]*"|[^,\n]*?)\s*,?\s*(?://.*)?$''', re.M)
+# Date.now() / 1000, optionally plus or minus N or N * M seconds
+NOW_EXPR = re.compile(r'Date\.now\(\)\s*/\s*1000(?:\s*([+-])\s*(\d+(?:\.\d+)?)(?:\s*\*\s*(\d+(?:\.\d+)?))?)?')
+
+
+class AnalyticsError(Exception):
+    pass
+
+
+class Codes:
+    """Numbers text values in order of first appearance."""
+
+    def __init__(self):
+        self.labels = []
+        self.codes = {}
+
+    def __call__(self, value):
+        code = self.codes.get(value)
+        if code is None:
+            code = self.codes[value] = len(self.labels)
+            self.labels.append(value)
+        return code
+
+
+class Table:
+    """Records as columns: an ``array`` per field, text fields as codes into
+    ``labels[field]``, plus the record ids."""
+
+    def __init__(self, ids, columns, labels):
+        self.ids = ids
+        self.columns = columns
+        self.labels = labels
+
+    def __len__(self):
+        return len(self.ids)
+
+    def column(self, name):
+        """The column as a NumPy array sharing its buffer, or the ``array``."""
+        values = self.columns[name]
+        if np is None:
+            return values
+        column = np.asarray(values)
+        # Flags are stored as bytes
+        return column.view(np.bool_) if values.typecode == 'b' else column
+
+
+def _text(value):
+    if value is None:
+        return 'Unknown'
+    return ' '.join(str(value).split()) or 'Unknown'
+
+
+def _number(value):
+    """``value`` as a float; NaN when missing or not a number. (mockData.ts
+    keeps amounts as strings.)"""
+    if isinstance(value, bool):
+        return math.nan
+    if isinstance(value, (int, float)):
+        return float(value)
+    if isinstance(value, str):
+        try:
+            return float(value)
+        except ValueError:
+            pass
+    return math.nan
+
+
+def _day(value):
+    """Day number of an ISO date (or date-time) string, else ``NO_DAY``."""
+    try:
+        return datetime.date.fromisoformat(value[:10]).toordinal() - EPOCH_ORDINAL
+    except (TypeError, ValueError):
+        return NO_DAY
+
+
+def _epoch_day(seconds):
+    return int(seconds // 86400) if math.isfinite(seconds) else NO_DAY
+
+
+def read_nfts(json_path):
+    with open(json_path, 'r', encoding='utf-8') as f:
+        return json.load(f).get('nfts', [])
+
+
+def read_log(log_path):
+    """Latest version of each record of an nft_store.py log, newest first
+    as in nfts.json."""
+    records = {}
+    with open(log_path, 'rb') as f:
+        # Header: the log's generation
+        f.readline()
+        for line in f:
+            if not line.endswith(b'\n'):
+                # Torn append
+                break
+            record = json.loads(line)
+            # Replacing a key keeps its place, as updates do in nfts.json
+            records[record['id']] = record
+    return list(reversed(records.values()))
+
+
+def nft_table(records):
+    """Load NFTRecords into a :class:`Table` in one pass."""
+    crops, regions = Codes(), Codes()
+    # Harvest dates repeat a lot: parse each once
+    days = {}
+    ids = []
+    crop, region, harvest = array('i'), array('i'), array('i')
+    value, expected, size = array('d'), array('d'), array('d')
+    active = array('b')
+    numbers = ((value, 'estimatedValue'), (expected, 'expectedYield'), (size, 'farmSize'))
+    plain = {int, float}
+    for record in records:
+        meta = record.get('metadata') or {}
+        ids.append(record.get('id'))
+        crop.append(crops(_text(meta.get('cropType'))))
+        region.append(regions(_text(meta.get('farmLocation'))))
+        for column, field in numbers:
+            number = meta.get(field)
+            # array('d') converts ints itself; bools and strings need _number()
+            column.append(number if type(number) in plain else _number(number))
+        date = meta.get('harvestDate')
+        day = days.get(date) if isinstance(date, str) else NO_DAY
+        if day is None:
+            day = days[date] = _day(date)
+        harvest.append(day)
+        active.append(bool(meta.get('isActive', True)))
+    columns = {
+        'cropType': crop, 'region': region, 'estimatedValue': value, 'expectedYield': expected,
+        'farmSize': size, 'harvestDay': harvest, 'isActive': active,
+    }
+    return Table(ids, columns, {'cropType': crops.labels, 'region': regions.labels})
+
+
+def _loan_value(field, text, now):
+    if text[:1] in ('"', "'"):
+        return text[1:-1]
+    try:
+        return float(text)
+    except ValueError:
+        pass
+    match = NOW_EXPR.fullmatch(text)
+    if match is None:
+        raise AnalyticsError(f"Cannot evaluate {field}: {text}")
+    sign, seconds, factor = match.groups()
+    if sign is None:
+        return now
+    offset = float(seconds) * float(factor or 1)
+    return now + offset if sign == '+' else now - offset
+
+
+def parse_mock_loans(source, now):
+    """The ``mockLoans`` entries of mockData.ts as dicts, evaluating
+    ``Date.now() / 1000 +- N * M`` relative to ``now`` (epoch seconds)."""
+    match = LOANS_ARRAY.search(source)
+    if match is None:
+        raise AnalyticsError("No mockLoans array found")
+    return [
+        {field: _loan_value(field, text, now) for field, text in LOAN_FIELD.findall(body)}
+        for body in LOAN_OBJECT.findall(match.group(1))
+    ]
+
+
+def read_loans(path, now):
+    with open(path, 'r', encoding='utf-8') as f:
+        if path.endswith('.json'):
+            data = json.load(f)
+            return data.get('loans', []) if isinstance(data, dict) else data
+        return parse_mock_loans(f.read(), now)
+
+
+def loan_table(loans):
+    """Load MockLoans into a :class:`Table` in one pass."""
+    crops = Codes()
+    ids = []
+    crop, status, harvest, created = array('i'), array('i'), array('i'), array('i')
+    requested, funded, collateral = array('d'), array('d'), array('d')
+    for loan in loans:
+        ids.append(loan.get('id'))
+        crop.append(crops(_text(loan.get('cropType'))))
+        code = loan.get('status')
+        status.append(int(code) if _number(code) in (0, 1, 2, 3) else len(LOAN_STATUSES))
+        harvest.append(_epoch_day(_number(loan.get('harvestDate'))))
+        created.append(_epoch_day(_number(loan.get('createdAt'))))
+        requested.append(_number(loan.get('requestedAmount')))
+        funded.append(_number(loan.get('fundedAmount')))
+        collateral.append(_number(loan.get('collateralValue')))
+    columns = {
+        'cropType': crop, 'status': status, 'harvestDay': harvest, 'createdDay': created,
+        'requestedAmount': requested, 'fundedAmount': funded, 'collateralValue': collateral,
+    }
+    return Table(ids, columns, {'cropType': crops.labels, 'status': list(LOAN_STATUSES) + ['Unknown']})
+
+
+# Column operations. Each has a NumPy and a plain Python path giving the
+# same numbers: sums accumulate in row order either way.
+
+def _map(fn, *columns):
+    """Apply ``fn`` to whole columns with NumPy, else row by row. ``fn`` may
+    only use operators meaning the same on arrays and on numbers:
+    arithmetic, comparisons, ``&``, ``|`` and ``<<`` (``x != x`` for NaN)."""
+    if np is not None:
+        return fn(*columns)
+    return [fn(*row) for row in zip(*columns)]
+
+
+def _count(mask):
+    if np is not None:
+        return int(np.count_nonzero(mask))
+    return sum(1 for selected in mask if selected)
+
+
+def _group_count(codes, groups, mask=None):
+    """Rows per code, over the rows selected by ``mask``."""
+    if np is not None:
+        if mask is None:
+            return np.bincount(codes, minlength=groups).tolist()
+        # Weighting by the mask is faster than selecting the rows
+        return np.bincount(codes, weights=mask, minlength=groups).astype(np.int64).tolist()
+    counts = [0] * groups
+    for i, code in enumerate(codes):
+        if mask is None or mask[i]:
+            counts[code] += 1
+    return counts
+
+
+def _group_sum(codes, values, groups, mask=None):
+    """Sum of ``values`` per code, over the rows selected by ``mask``; NaN
+    counts as 0."""
+    if np is not None:
+        keep = ~np.isnan(values) if mask is None else mask & ~np.isnan(values)
+        return np.bincount(codes, weights=np.where(keep, values, 0.0), minlength=groups).tolist()
+    totals = [0.0] * groups
+    for i, code in enumerate(codes):
+        value = values[i]
+        if value == value and (mask is None or mask[i]):
+            totals[code] += value
+    return totals
+
+
+def _density(expected, size):
+    """``expected / size`` where ``size`` is positive, else NaN."""
+    if np is not None:
+        with np.errstate(divide='ignore', invalid='ignore'):
+            return np.where(size > 0, expected / size, np.nan)
+    return array('d', [e / s if s > 0 else math.nan for e, s in zip(expected, size)])
+
+
+def _nonzero(values, limit):
+    """Indexes of the first ``limit`` non-zero values."""
+    if np is not None:
+        return np.flatnonzero(values)[:limit].tolist()
+    found = []
+    for i, value in enumerate(values):
+        if value:
+            found.append(i)
+            if len(found) == limit:
+                break
+    return found
+
+
+def _sorted_median(values):
+    n = len(values)
+    return (values[(n - 1) // 2] + values[n // 2]) / 2
+
+
+def _partition_median(values):
+    """:func:`_sorted_median` of an unsorted NumPy array, in linear time."""
+    n = len(values)
+    low, high = (n - 1) // 2, n // 2
+    values = np.partition(values, (low, high))
+    return (values[low] + values[high]) / 2
+
+
+def _density_stats(codes, density, groups):
+    """Median yield density per code, and a mask of the rows whose density
+    is an outlier for their code."""
+    if np is not None:
+        rows = np.flatnonzero(density > 0)
+        # Grouped by code (a stable sort of 16-bit ints is a radix sort)
+        keys = codes[rows].astype(np.uint16) if groups <= 1 << 16 else codes[rows]
+        rows = rows[np.argsort(keys, kind='stable')]
+        run_codes = codes[rows]
+        values = density[rows]
+        logs = np.log(values)
+        counts = np.bincount(run_codes, minlength=groups)
+        ends = np.cumsum(counts)
+        medians, centers, mads = np.full((3, groups), np.nan)
+        # One run per crop: a handful of them
+        for code in np.flatnonzero(counts):
+            run = slice(ends[code] - counts[code], ends[code])
+            medians[code] = _partition_median(values[run])
+            centers[code] = _partition_median(logs[run])
+        deviations = np.abs(logs - centers[run_codes])
+        for code in np.flatnonzero(counts):
+            mads[code] = _partition_median(deviations[ends[code] - counts[code]:ends[code]])
+        checked = (counts >= MIN_OUTLIER_GROUP) & (mads > 0)
+        with np.errstate(divide='ignore', invalid='ignore'):
+            scores = 0.6745 * deviations / mads[run_codes]
+        outliers = np.zeros(len(codes), np.bool_)
+        outliers[rows[checked[run_codes] & (scores > OUTLIER_Z)]] = True
+        return medians.tolist(), outliers
+
+    runs = [[] for _ in range(groups)]
+    for i, (code, value) in enumerate(zip(codes, density)):
+        if value > 0:
+            runs[code].append((value, i))
+    medians = []
+    outliers = [False] * len(codes)
+    for run in runs:
+        if not run:
+            medians.append(math.nan)
+            continue
+        run.sort()
+        medians.append(_sorted_median([value for value, _ in run]))
+        if len(run) < MIN_OUTLIER_GROUP:
+            continue
+        logs = [math.log(value) for value, _ in run]
+        center = _sorted_median(logs)
+        deviations = [abs(log - center) for log in logs]
+        mad = _sorted_median(sorted(deviations))
+        if mad > 0:
+            for (_, i), deviation in zip(run, deviations):
+                if 0.6745 * deviation / mad > OUTLIER_Z:
+                    outliers[i] = True
+    return medians, outliers
+
+
+def _round(value, digits=2):
+    return None if value != value else round(float(value), digits)
+
+
+def _flagged(table, flags, names, extra):
+    """Flag counts and the first flagged records, with ``extra(i)`` fields."""
+    counts = {name: _count(_map(lambda f, bit=bit: (f & (1 << bit)) != 0, flags)) for bit, name in enumerate(names)}
+    listed = []
+    for i in _nonzero(flags, MAX_FLAGGED):
+        bits = int(flags[i])
+        listed.append(dict(id=table.ids[i], flags=[name for bit, name in enumerate(names) if bits >> bit & 1],
+                           **extra(i)))
+    return {'counts': counts, 'total': _count(flags), 'records': listed}
+
+
+def _window_bounds(today):
+    return [(days, today, today + days) for days in WINDOWS]
+
+
+def summarize_nfts(table, today):
+    """Summary of the NFT :class:`Table` as of day number ``today``."""
+    crops, regions = table.labels['cropType'], table.labels['region']
+    n_crops, n_regions = len(crops), len(regions)
+    crop, region = table.column('cropType'), table.column('region')
+    value, expected, size = table.column('estimatedValue'), table.column('expectedYield'), table.column('farmSize')
+    harvest, active = table.column('harvestDay'), table.column('isActive')
+
+    density = _density(expected, size)
+    medians, outliers = _density_stats(crop, density, n_crops)
+    flags = _map(
+        lambda s, e, v, d, o, h: (
+            (s < 0) | (s == 0) << 1 | (s != s) << 2 | (e < 0) << 3 | (v < 0) << 4
+            | (d > MAX_YIELD_PER_HECTARE) << 5 | o << 6 | (h == NO_DAY) << 7
+        ),
+        size, expected, value, density, outliers, harvest)
+
+    counts = _group_count(crop, n_crops)
+    values = _group_sum(crop, value, n_crops)
+    yields = _group_sum(crop, expected, n_crops)
+    areas = _group_sum(crop, size, n_crops, _map(lambda s: s > 0, size))
+    pairs = _map(lambda c, r: c * n_regions + r, crop, region)
+    pair_counts = _group_count(pairs, n_crops * n_regions)
+    pair_values = _group_sum(pairs, value, n_crops * n_regions)
+    region_counts = _group_count(region, n_regions)
+    region_values = _group_sum(region, value, n_regions)
+
+    by_crop = {}
+    for c in sorted(range(n_crops), key=crops.__getitem__):
+        by_crop[crops[c]] = {
+            'count': counts[c],
+            'estimatedValue': _round(values[c]),
+            'expectedYield': _round(yields[c]),
+            'farmSize': _round(areas[c]),
+            'medianYieldPerHectare': _round(medians[c], 3),
+            'byRegion': {
+                regions[r]: {'count': pair_counts[c * n_regions + r],
+                             'estimatedValue': _round(pair_values[c * n_regions + r])}
+                for r in sorted(range(n_regions), key=regions.__getitem__) if pair_counts[c * n_regions + r]
+            },
+        }
+    by_region = {
+        regions[r]: {'count': region_counts[r], 'estimatedValue': _round(region_values[r])}
+        for r in sorted(range(n_regions), key=regions.__getitem__)
+    }
+
+    exposure = []
+    for days, start, end in _window_bounds(today):
+        due = _map(lambda a, h: a & (h >= start) & (h <= end), active, harvest)
+        due_values = _group_sum(crop, value, n_crops, due)
+        exposure.append({
+            'days': days,
+            'count': _count(due),
+            'estimatedValue': _round(sum(due_values)),
+            'byCropType': {crops[c]: _round(due_values[c]) for c in sorted(range(n_crops), key=crops.__getitem__)
+                           if due_values[c]},
+        })
+    overdue = _map(lambda a, h: a & (h != NO_DAY) & (h < today), active, harvest)
+
+    return {
+        'count': len(table),
+        'active': _count(active),
+        'estimatedValue': _round(sum(values)),
+        'byCropType': by_crop,
+        'byRegion': by_region,
+        'harvestExposure': exposure,
+        'overdue': {'count': _count(overdue), 'estimatedValue': _round(sum(_group_sum(crop, value, n_crops, overdue)))},
+        'flags': _flagged(table, flags, NFT_FLAGS,
+                          lambda i: {'cropType': crops[int(crop[i])], 'yieldPerHectare': _round(density[i], 3)}),
+    }
+
+
+def summarize_loans(table, today):
+    """Summary of the loan :class:`Table` as of day number ``today``."""
+    crops, statuses = table.labels['cropType'], table.labels['status']
+    n_crops, n_statuses = len(crops), len(statuses)
+    crop, status = table.column('cropType'), table.column('status')
+    requested, funded = table.column('requestedAmount'), table.column('fundedAmount')
+    collateral = table.column('collateralValue')
+    harvest, created = table.column('harvestDay'), table.column('createdDay')
+
+    flags = _map(
+        lambda r, f, c, h, d: (
+            ((r != r) | (f != f) | (c != c)) | (f > r) << 1
+            | ((h != NO_DAY) & (d != NO_DAY) & (h < d)) << 2 | (h == NO_DAY) << 3
+        ),
+        requested, funded, collateral, harvest, created)
+
+    def amounts(codes, groups, mask=None):
+        return (_group_count(codes, groups, mask), _group_sum(codes, requested, groups, mask),
+                _group_sum(codes, funded, groups, mask), _group_sum(codes, collateral, groups, mask))
+
+    def entries(labels, codes, groups, mask=None, keep_empty=True):
+        counts, req, fund, coll = amounts(codes, groups, mask)
+        return {
+            labels[g]: {'count': counts[g], 'requestedAmount': _round(req[g]), 'fundedAmount': _round(fund[g]),
+                        'collateralValue': _round(coll[g])}
+            for g in range(groups) if keep_empty or counts[g]
+        }
+
+    # Pending and Funded loans still depend on their harvest
+    open_loans = _map(lambda s: s <= 1, status)
+    exposure = []
+    for days, start, end in _window_bounds(today):
+        due = _map(lambda o, h: o & (h >= start) & (h <= end), open_loans, harvest)
+        _, req, fund, _ = amounts(crop, n_crops, due)
+        exposure.append({
+            'days': days,
+            'count': _count(due),
+            'requestedAmount': _round(sum(req)),
+            'fundedAmount': _round(sum(fund)),
+        })
+
+    return {
+        'count': len(table),
+        'requestedAmount': _round(sum(_group_sum(crop, requested, n_crops))),
+        'fundedAmount': _round(sum(_group_sum(crop, funded, n_crops))),
+        'byStatus': entries(statuses, status, n_statuses, keep_empty=False),
+        'byCropType': dict(sorted(entries(crops, crop, n_crops).items())),
+        'harvestExposure': exposure,
+        'flags': _flagged(table, flags, LOAN_FLAGS, lambda i: {}),
+    }
+
+
+def _stat(path):
+    st = os.stat(path)
+    return [st.st_size, st.st_mtime_ns]
+
+
+def is_fresh(out_path, sources, as_of):
+    """Whether the summary at ``out_path`` is for ``sources`` (path -> stat)
+    and the day ``as_of``."""
+    try:
+        with open(out_path, 'r', encoding='utf-8') as f:
+            summary = json.load(f)
+    except (OSError, ValueError):
+        return False
+    return (isinstance(summary, dict) and summary.get('format') == SUMMARY_FORMAT
+            and summary.get('asOf') == as_of and summary.get('sources') == sources)
+
+
+def build_summary(nft_path, loans_path, as_of, from_log=False, now=None):
+    """Read both sources and return ``(summary, timings)``, ``timings``
+    being ``(step, seconds)`` tuples."""
+    today = as_of.toordinal() - EPOCH_ORDINAL
+    if now is None:
+        now = time.time()
+    timings = []
+
+    start = time.perf_counter()
+    nfts = nft_table(read_log(nft_path) if from_log else read_nfts(nft_path))
+    loans = loan_table(read_loans(loans_path, now))
+    timings.append(('load', time.perf_counter() - start))
+
+    start = time.perf_counter()
+    summary = {
+        'format': SUMMARY_FORMAT,
+        'asOf': as_of.isoformat(),
+        'generatedAt': datetime.datetime.now(datetime.timezone.utc).isoformat(timespec='seconds'),
+        'sources': {},
+        'nfts': summarize_nfts(nfts, today),
+        'loans': summarize_loans(loans, today),
+    }
+    timings.append(('summarize', time.perf_counter() - start))
+    return summary, timings
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--dir', default=DATA_DIR, help='directory of the NFT store (default: %(default)s)')
+    source = parser.add_mutually_exclusive_group()
+    source.add_argument('--json', help='NFT store to read (default: DIR/nfts.json)')
+    source.add_argument('--from-log', action='store_true', help='read the nft_store.py log (DIR/nfts.log)')
+    parser.add_argument('--loans', default=LOANS_FILE,
+                        help='mockData.ts, or a JSON list of loans (default: %(default)s)')
+    parser.add_argument('--out', help=f'summary file (default: DIR/{SUMMARY_FILE})')
+    parser.add_argument('--today', type=datetime.date.fromisoformat, default=None,
+                        help='day the harvest windows start from (default: today)')
+    parser.add_argument('--force', action='store_true', help='rebuild even if the summary is up to date')
+    args = parser.parse_args()
+
+    nft_path = os.path.join(args.dir, LOG_FILE) if args.from_log else args.json or os.path.join(args.dir, JSON_FILE)
+    out_path = args.out or os.path.join(args.dir, SUMMARY_FILE)
+    as_of = args.today or datetime.date.today()
+    # Date.now() in mockData.ts: midnight UTC of --today, for reproducible runs
+    now = None if args.today is None else (as_of.toordinal() - EPOCH_ORDINAL) * 86400
+
+    try:
+        sources = {path: _stat(path) for path in (nft_path, args.loans)}
+    except OSError as e:
+        print(f"❌ {e}")
+        return 1
+    if not args.force and is_fresh(out_path, sources, as_of.isoformat()):
+        print(f"⏭️  {out_path} is up to date")
+        return 0
+
+    try:
+        summary, timings = build_summary(nft_path, args.loans, as_of, args.from_log, now)
+    except (OSError, ValueError, AnalyticsError) as e:
+        print(f"❌ {e}")
+        return 1
+    summary['sources'] = sources
+    with atomic_write(out_path) as f:
+        json.dump(summary, f, ensure_ascii=False, indent=2)
+        f.write('\n')
+
+    nfts, loans = summary['nfts'], summary['loans']
+    print(f"✅ {out_path}: {nfts['count']} NFTs, {loans['count']} loans")
+    for name, flagged in (('NFTs', nfts['flags']), ('loans', loans['flags'])):
+        if flagged['total']:
+            counts = ', '.join(f"{flag} {count}" for flag, count in flagged['counts'].items() if count)
+            print(f"⚠️  {flagged['total']} {name} flagged: {counts}")
+    backend = 'NumPy' if np is not None else 'plain Python'
+    print('⏱️  ' + ', '.join(f"{name} {seconds * 1000:.1f} ms" for name, seconds in timings) + f" ({backend})")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
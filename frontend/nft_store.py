@@ -0,0 +1,498 @@
+#!/usr/bin/env python3
+"""Append-only record log with a memory-mapped index for data/nfts.json.
+
+Usage: python3 nft_store.py import [--json FILE] [--force]
+       python3 nft_store.py get ID
+       python3 nft_store.py farmer ADDRESS
+       python3 nft_store.py token TOKEN_ID
+       python3 nft_store.py list [--offset N] [--limit N]
+       python3 nft_store.py append FILE
+       python3 nft_store.py index
+       python3 nft_store.py compact
+       python3 nft_store.py export [--json FILE]
+
+lib/nftDatabase.ts keeps every NFTRecord in data/nfts.json, which is parsed
+whole for every lookup and rewritten whole for every save. This tool keeps
+the same records in two files (--dir, default: data):
+
+nfts.log  One compact JSON record per line, appended to on every save; a
+          later line with the same ``id`` replaces the earlier one. The
+          first line is a header holding the log's generation, which
+          ``compact`` increments.
+nfts.idx  Binary index of the log, read through mmap. For each of ``id``,
+          ``farmerAddress`` (lower-cased, as nftDatabase.ts compares it) and
+          ``tokenId``, fixed-size entries sorted by key hash give the
+          position of every record; a position table maps positions, in
+          insertion order, to the latest version of the record in the log.
+
+Lookups binary-search the index and parse only the matching lines, plus the
+lines appended since the index was built (the tail), so appends never touch
+the index; rerun ``index`` once the tail grows. ``compact`` rewrites the log
+without replaced versions. ``export`` writes ``{"nfts": [...]}`` back in the
+order nftDatabase.ts keeps it (newest first, updates in place), as
+JSON.stringify(..., null, 2) formats it.
+
+All integers in the index are little-endian; key hashes are the first 8
+bytes of the SHA-256 of the UTF-8 key, so the format is easy to read from
+Node as well.
+"""
+import argparse
+import hashlib
+import json
+import mmap
+import os
+import struct
+import sys
+
+from codemod.pipeline import atomic_write
+
+DATA_DIR = 'data'
+JSON_FILE = 'nfts.json'
+LOG_FILE = 'nfts.log'
+INDEX_FILE = 'nfts.idx'
+LOG_FORMAT = 1
+
+INDEX_MAGIC = b'NFTIDX01'
+# magic, log generation, log bytes covered, record count, entries per key
+INDEX_HEADER = struct.Struct('<8sQQQQQQ')
+# key hash, record position
+KEY_ENTRY = struct.Struct('<QI')
+# log offset, line length (without the newline)
+POSITION_ENTRY = struct.Struct('<QI')
+
+# Index sections, in file order after the position table
+KEYS = (
+    ('id', lambda record: record['id']),
+    ('farmer', lambda record: record['farmerAddress'].lower()),
+    ('token', lambda record: record['tokenId']),
+)
+
+
+class StoreError(Exception):
+    pass
+
+
+def key_hash(key):
+    return int.from_bytes(hashlib.sha256(key.encode('utf-8')).digest()[:8], 'little')
+
+
+def encode_record(record):
+    return json.dumps(record, ensure_ascii=False, separators=(',', ':')).encode('utf-8') + b'\n'
+
+
+def _header_line(generation):
+    return json.dumps({'nftlog': LOG_FORMAT, 'generation': generation}).encode('utf-8') + b'\n'
+
+
+def _parse_header(line):
+    try:
+        header = json.loads(line)
+        if header.get('nftlog') == LOG_FORMAT:
+            return header['generation']
+    except (ValueError, AttributeError, KeyError):
+        pass
+    raise StoreError("Not an NFT record log (bad header line)")
+
+
+class Layout:
+    """Where the latest version of each record of a log is.
+
+    ``positions`` lists ``(offset, length)`` of those lines in insertion
+    order, ``keys`` their index keys, and ``end`` is the offset after the
+    last line accounted for.
+    """
+
+    def __init__(self, generation, header_length):
+        self.generation = generation
+        self.end = header_length
+        self.by_id = {}
+        self.positions = []
+        self.keys = []
+
+    def add(self, record, length):
+        """Account for ``record`` as the next line, ``length`` bytes long
+        without its newline."""
+        position = self.by_id.setdefault(record['id'], len(self.positions))
+        keys = tuple(key(record) for _, key in KEYS)
+        if position == len(self.positions):
+            self.positions.append((self.end, length))
+            self.keys.append(keys)
+        else:
+            self.positions[position] = (self.end, length)
+            self.keys[position] = keys
+        self.end += length + 1
+
+
+def read_layout(path):
+    """Return the :class:`Layout` of the log at ``path``.
+
+    A last line without a newline (a torn append) is left out.
+    """
+    with open(path, 'rb') as f:
+        header = f.readline()
+        layout = Layout(_parse_header(header), len(header))
+        for line in f:
+            if not line.endswith(b'\n'):
+                break
+            layout.add(json.loads(line), len(line) - 1)
+    return layout
+
+
+def _write_chunks(path, chunks):
+    with atomic_write(path, binary=True) as f:
+        for chunk in chunks:
+            f.write(chunk)
+
+
+def build_index(log_path, index_path):
+    """(Re)build the index of the log at ``log_path``. Returns the record count."""
+    return write_index(index_path, read_layout(log_path))
+
+
+def write_index(index_path, layout):
+    """Write the index of the log described by ``layout``. Returns the
+    record count."""
+    sections = []
+    for k in range(len(KEYS)):
+        sections.append(sorted((key_hash(keys[k]), position) for position, keys in enumerate(layout.keys)))
+
+    def chunks():
+        yield INDEX_HEADER.pack(INDEX_MAGIC, layout.generation, layout.end, len(layout.positions),
+                                *(len(section) for section in sections))
+        yield b''.join(POSITION_ENTRY.pack(offset, length) for offset, length in layout.positions)
+        for section in sections:
+            yield b''.join(KEY_ENTRY.pack(h, position) for h, position in section)
+
+    _write_chunks(index_path, chunks())
+    return len(layout.positions)
+
+
+class NFTStore:
+    """Read access to a record log through its index.
+
+    The log and index are mapped when the store is opened; records appended
+    later are not seen until it is reopened.
+    """
+
+    def __init__(self, directory=DATA_DIR):
+        self.log_path = os.path.join(directory, LOG_FILE)
+        self.index_path = os.path.join(directory, INDEX_FILE)
+        self._files = []
+        self.log = self.index = None
+        try:
+            self._open()
+        except BaseException:
+            self.close()
+            raise
+
+    def _open(self):
+        try:
+            self.log = self._map(self.log_path)
+            self.index = self._map(self.index_path)
+        except FileNotFoundError as e:
+            raise StoreError(f"{e.filename} not found (run: nft_store.py import)") from None
+        self.generation = _parse_header(self.log[:self.log.find(b'\n') + 1])
+
+        if len(self.index) < INDEX_HEADER.size or self.index[:len(INDEX_MAGIC)] != INDEX_MAGIC:
+            raise StoreError(f"{self.index_path} is not an NFT index")
+        _, generation, covered, count, *sizes = INDEX_HEADER.unpack_from(self.index, 0)
+        if generation != self.generation or covered > len(self.log):
+            raise StoreError(f"{self.index_path} does not match {self.log_path} (run: nft_store.py index)")
+        self.count_indexed = count
+        self._positions = INDEX_HEADER.size
+        self._sections = {}
+        base = self._positions + count * POSITION_ENTRY.size
+        for (name, _), size in zip(KEYS, sizes):
+            self._sections[name] = (base, size)
+            base += size * KEY_ENTRY.size
+
+        # Lines appended since the index was built
+        self.tail = {}
+        order = []
+        pos = covered
+        while True:
+            end = self.log.find(b'\n', pos)
+            if end == -1:
+                break
+            record = json.loads(self.log[pos:end])
+            if record['id'] not in self.tail:
+                order.append(record['id'])
+            self.tail[record['id']] = record
+            pos = end + 1
+        # Tail ids already in the index keep their position
+        self._tail_positions = {}
+        for nft_id in order:
+            position = self._indexed_position(nft_id)
+            if position is not None:
+                self._tail_positions[nft_id] = position
+        self._tail_new = [nft_id for nft_id in order if nft_id not in self._tail_positions]
+
+    def _map(self, path):
+        f = open(path, 'rb')
+        self._files.append(f)
+        if not os.fstat(f.fileno()).st_size:
+            # mmap refuses empty files
+            raise StoreError(f"{path} is empty")
+        return mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+
+    def close(self):
+        for mapped in (self.log, self.index):
+            if mapped is not None:
+                mapped.close()
+        self.log = self.index = None
+        for f in self._files:
+            f.close()
+        self._files = []
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def _at(self, position):
+        """The indexed record at ``position``."""
+        offset, length = POSITION_ENTRY.unpack_from(self.index, self._positions + position * POSITION_ENTRY.size)
+        return json.loads(self.log[offset:offset + length])
+
+    def _candidates(self, name, key):
+        """Positions whose ``name`` key hash equals that of ``key``."""
+        base, size = self._sections[name]
+        target = key_hash(key)
+        lo, hi = 0, size
+        while lo < hi:
+            mid = (lo + hi) // 2
+            if KEY_ENTRY.unpack_from(self.index, base + mid * KEY_ENTRY.size)[0] < target:
+                lo = mid + 1
+            else:
+                hi = mid
+        while lo < size:
+            h, position = KEY_ENTRY.unpack_from(self.index, base + lo * KEY_ENTRY.size)
+            if h != target:
+                break
+            yield position
+            lo += 1
+
+    def _indexed_position(self, nft_id):
+        for position in self._candidates('id', nft_id):
+            if self._at(position)['id'] == nft_id:
+                return position
+        return None
+
+    def count(self):
+        return self.count_indexed + len(self._tail_new)
+
+    def get(self, nft_id):
+        """The record with ``id`` ``nft_id``, or ``None`` (getNFTById)."""
+        if nft_id in self.tail:
+            return self.tail[nft_id]
+        position = self._indexed_position(nft_id)
+        return None if position is None else self._at(position)
+
+    def _lookup(self, name, key):
+        """Records whose ``name`` key is ``key``, newest first."""
+        key_of = dict(KEYS)[name]
+        # (position, record); tail records new to the index come first
+        found = []
+        for position in self._candidates(name, key):
+            record = self._at(position)
+            if record['id'] not in self.tail and key_of(record) == key:
+                found.append((position, record))
+        for nft_id, position in self._tail_positions.items():
+            if key_of(self.tail[nft_id]) == key:
+                found.append((position, self.tail[nft_id]))
+        for i, nft_id in enumerate(self._tail_new):
+            if key_of(self.tail[nft_id]) == key:
+                found.append((self.count_indexed + i, self.tail[nft_id]))
+        found.sort(key=lambda item: item[0], reverse=True)
+        return [record for _, record in found]
+
+    def by_farmer(self, address):
+        """Records of farmer ``address``, case-insensitive (getNFTsByFarmer)."""
+        return self._lookup('farmer', address.lower())
+
+    def by_token(self, token_id):
+        """Records minted under HTS token ``token_id``."""
+        return self._lookup('token', token_id)
+
+    def page(self, offset=0, limit=None):
+        """Records ``offset`` to ``offset + limit``, newest first (getAllNFTs)."""
+        total = self.count()
+        end = total if limit is None else min(total, offset + limit)
+        records = []
+        for k in range(offset, end):
+            position = total - 1 - k
+            if position >= self.count_indexed:
+                records.append(self.tail[self._tail_new[position - self.count_indexed]])
+                continue
+            record = self._at(position)
+            records.append(self.tail.get(record['id'], record))
+        return records
+
+
+def _generation(log_path):
+    try:
+        with open(log_path, 'rb') as f:
+            return _parse_header(f.readline())
+    except FileNotFoundError:
+        return 0
+
+
+def _check_records(records):
+    """Raise :class:`StoreError` unless every record has the indexed fields."""
+    for record in records:
+        if not isinstance(record, dict):
+            raise StoreError(f"Not an NFT record: {record!r}")
+        for field in ('id', 'tokenId', 'farmerAddress'):
+            if not isinstance(record.get(field), str):
+                raise StoreError(f"Record {record.get('id')!r} has no {field}")
+
+
+def import_json(json_path, directory=DATA_DIR, force=False):
+    """Create the log and index from a nftDatabase.ts JSON file."""
+    log_path = os.path.join(directory, LOG_FILE)
+    if os.path.exists(log_path) and not force:
+        raise StoreError(f"{log_path} already exists (use --force to replace it)")
+    with open(json_path, 'r', encoding='utf-8') as f:
+        data = json.load(f)
+    nfts = data.get('nfts', []) if isinstance(data, dict) else None
+    if not isinstance(nfts, list):
+        raise StoreError(f"{json_path} has no nfts list")
+    _check_records(nfts)
+    generation = _generation(log_path) + 1
+    header = _header_line(generation)
+    # Indexed as written rather than by parsing the log again
+    layout = Layout(generation, len(header))
+
+    def chunks():
+        yield header
+        # nfts.json is newest first; the log is oldest first
+        for record in reversed(nfts):
+            line = encode_record(record)
+            layout.add(record, len(line) - 1)
+            yield line
+
+    _write_chunks(log_path, chunks())
+    return write_index(os.path.join(directory, INDEX_FILE), layout)
+
+
+def append_records(records, directory=DATA_DIR):
+    """Append ``records`` (new or replacing ones with the same ``id``) to the log."""
+    _check_records(records)
+    log_path = os.path.join(directory, LOG_FILE)
+    with open(log_path, 'r+b') as f:
+        # Drop a torn last line left by an interrupted append
+        data_end = f.seek(0, os.SEEK_END)
+        if data_end:
+            f.seek(max(0, data_end - 1))
+            if f.read(1) != b'\n':
+                f.seek(0)
+                end = f.read().rfind(b'\n') + 1
+                f.truncate(end)
+                f.seek(end)
+        for record in records:
+            f.write(encode_record(record))
+    return len(records)
+
+
+def compact(directory=DATA_DIR):
+    """Rewrite the log keeping only the latest version of each record and
+    rebuild the index. Returns ``(records kept, bytes before, bytes after)``."""
+    log_path = os.path.join(directory, LOG_FILE)
+    before = os.path.getsize(log_path)
+    layout = read_layout(log_path)
+
+    def chunks():
+        yield _header_line(layout.generation + 1)
+        with open(log_path, 'rb') as f:
+            for offset, length in layout.positions:
+                f.seek(offset)
+                yield f.read(length + 1)
+
+    _write_chunks(log_path, chunks())
+    # Until the index is replaced, its generation no longer matches the log
+    build_index(log_path, os.path.join(directory, INDEX_FILE))
+    return len(layout.positions), before, os.path.getsize(log_path)
+
+
+def export_json(json_path, directory=DATA_DIR):
+    """Write the records back as nftDatabase.ts stores them. Returns the count."""
+    log_path = os.path.join(directory, LOG_FILE)
+    nfts = []
+    with open(log_path, 'rb') as f:
+        for offset, length in reversed(read_layout(log_path).positions):
+            f.seek(offset)
+            nfts.append(json.loads(f.read(length)))
+    with atomic_write(json_path) as f:
+        json.dump({'nfts': nfts}, f, ensure_ascii=False, indent=2)
+    return len(nfts)
+
+
+def print_records(records):
+    print(json.dumps(records, ensure_ascii=False, indent=2))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--dir', default=DATA_DIR, help='directory of the log and index (default: %(default)s)')
+    commands = parser.add_subparsers(dest='command', required=True)
+    command = commands.add_parser('import', help='create the log and index from a JSON store')
+    command.add_argument('--json', help='JSON store to import (default: DIR/nfts.json)')
+    command.add_argument('--force', action='store_true', help='replace an existing log')
+    commands.add_parser('get', help='print the record with an id').add_argument('id')
+    commands.add_parser('farmer', help="print a farmer's records").add_argument('address')
+    commands.add_parser('token', help='print the records of an HTS token').add_argument('token_id')
+    command = commands.add_parser('list', help='print records newest first')
+    command.add_argument('--offset', type=int, default=0)
+    command.add_argument('--limit', type=int, default=None)
+    command = commands.add_parser('append', help="append records from a JSON file ('-' for stdin)")
+    command.add_argument('file')
+    commands.add_parser('index', help='rebuild the index, folding in the tail')
+    commands.add_parser('compact', help='drop replaced versions from the log')
+    command = commands.add_parser('export', help='write the records back as a JSON store')
+    command.add_argument('--json', help='output file (default: DIR/nfts.json)')
+    args = parser.parse_args()
+
+    json_path = getattr(args, 'json', None) or os.path.join(args.dir, JSON_FILE)
+    try:
+        if args.command == 'import':
+            count = import_json(json_path, args.dir, force=args.force)
+            print(f"✅ Imported {count} records from {json_path}")
+        elif args.command == 'append':
+            if args.file == '-':
+                data = json.load(sys.stdin)
+            else:
+                with open(args.file, 'r', encoding='utf-8') as f:
+                    data = json.load(f)
+            count = append_records(data if isinstance(data, list) else [data], args.dir)
+            print(f"✅ Appended {count} records")
+        elif args.command == 'index':
+            count = build_index(os.path.join(args.dir, LOG_FILE), os.path.join(args.dir, INDEX_FILE))
+            print(f"✅ Indexed {count} records")
+        elif args.command == 'compact':
+            count, before, after = compact(args.dir)
+            print(f"✅ Compacted {count} records: {before} -> {after} bytes")
+        elif args.command == 'export':
+            count = export_json(json_path, args.dir)
+            print(f"✅ Exported {count} records to {json_path}")
+        else:
+            with NFTStore(args.dir) as store:
+                if args.command == 'get':
+                    record = store.get(args.id)
+                    if record is None:
+                        print(f"❌ No NFT with id {args.id}")
+                        sys.exit(1)
+                    print_records(record)
+                elif args.command == 'farmer':
+                    print_records(store.by_farmer(args.address))
+                elif args.command == 'token':
+                    print_records(store.by_token(args.token_id))
+                else:
+                    print_records(store.page(args.offset, args.limit))
+    except (StoreError, OSError, ValueError) as e:
+        print(f"❌ {e}")
+        sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
@@ -1,16 +1,83 @@
 #!/usr/bin/env python3
+"""Remove Indonesian crop labels from <option> text.
+
+Usage:
+    python3 remove_indonesian_text.py                 # components/CreateHarvestNFTForm.tsx
+    python3 remove_indonesian_text.py --all [ROOT]    # every .tsx under ROOT/app and ROOT/components
+
+With --stream, files are rewritten chunk by chunk in bounded memory (for
+generated or bundled sources too large to load at once); the result is the
+same as the default in-memory rewrite.
+"""
+import argparse
 import re
+from functools import partial
 
-# Read the file
-with open('components/CreateHarvestNFTForm.tsx', 'r') as f:
-    content = f.read()
+from codemod.journal import run_migration
+from codemod.parallel import discover, run_parallel
+from codemod.pipeline import Stage, read_file, update_file
+from codemod.steps import run_steps
+from codemod.stream import stream_file, stream_sub
+
+TARGET = 'components/CreateHarvestNFTForm.tsx'
 
 # Remove Indonesian text in parentheses from option values
-# Pattern: (Text in Indonesian)
-content = re.sub(r' \([^)]+\)</option>', '</option>', content)
+# Pattern: (Text in Indonesian). The label length is capped so a stray
+# " (" cannot start a scan to the end of a large file, and so streaming
+# mode knows how much text a match can span.
+MAX_LABEL = 256
+OPTION_LABEL_RE = re.compile(r' \([^)]{1,%d}\)</option>' % MAX_LABEL)
+MAX_MATCH = len(' ()</option>') + MAX_LABEL
+STEPS = [('regex', 'option_labels', OPTION_LABEL_RE, '</option>')]
+
+
+def transform(content):
+    return run_steps(content, STEPS)[0]
+
+
+def strip_labels(src, dst):
+    return stream_sub(OPTION_LABEL_RE, '</option>', src, dst, MAX_MATCH)
+
+
+def process_file(path, stream=False):
+    """Rewrite ``path`` in place and return the number of labels removed."""
+    if stream:
+        return stream_file(path, strip_labels)
+    original = read_file(path)
+    content, count = OPTION_LABEL_RE.subn('</option>', original)
+    update_file(path, original, content)
+    return count
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Remove Indonesian crop labels from <option> text.')
+    parser.add_argument('--all', nargs='?', const='.', metavar='ROOT',
+                        help='process every .tsx file under ROOT/app and ROOT/components')
+    parser.add_argument('--stream', action='store_true', help='rewrite files in bounded memory')
+    parser.add_argument('--jobs', '-j', type=int, default=None,
+                        help='worker processes for --all (default: CPU count)')
+    args = parser.parse_args()
+
+    if args.all is None and args.stream:
+        count = process_file(TARGET, stream=True)
+        print(f"✅ Removed {count} labels from CreateHarvestNFTForm.tsx" if count
+              else "ℹ️  No Indonesian labels left in CreateHarvestNFTForm.tsx")
+        return
+    if args.all is None:
+        timings, changed = run_migration(TARGET, Stage('remove_indonesian_text', transform))
+        if changed:
+            print("✅ Removed Indonesian text from CreateHarvestNFTForm.tsx")
+        elif timings:
+            print("ℹ️  No Indonesian labels left in CreateHarvestNFTForm.tsx")
+        return
+
+    results = run_parallel(partial(process_file, stream=args.stream), discover(args.all), jobs=args.jobs)
+    changed = [(path, count) for path, count in results if count]
+    for path, count in changed:
+        print(f"✅ {path}: removed {count} labels")
+    total = sum(count for _, count in changed)
+    print(f"✅ Removed {total} labels from {len(changed)} of {len(results)} files")
 
-# Write back
-with open('components/CreateHarvestNFTForm.tsx', 'w') as f:
-    f.write(content)
 
-print("✅ Removed Indonesian text from CreateHarvestNFTForm.tsx")
+if __name__ == '__main__':
+    main()
@@ -1,14 +1,10 @@
 #!/usr/bin/env python3
+from codemod.journal import run_migration
+from codemod.pipeline import Stage
+from codemod.rules import Rule, RuleSet
+from codemod.steps import run_steps
 
-# Read the file
-with open('app/farmer/page.tsx', 'r') as f:
-    content = f.read()
-
-# 1. Update activeTab type - remove 'loans'
-content = content.replace(
-    "useState<'create' | 'loans' | 'nfts'>('create')",
-    "useState<'create' | 'nfts'>('create')"
-)
+TARGET = 'app/farmer/page.tsx'
 
 # 2. Remove "My Loans" tab button
 my_loans_button = '''                    <button
@@ -22,10 +18,7 @@ my_loans_button = '''                    <button
                         My Loans
                     </button>'''
 
-content = content.replace(my_loans_button, '')
-
 # 3. Update content rendering to show form + list in 2 columns for 'create' tab
-# Find and replace the content section
 old_create_content = '''                {activeTab === 'create' ? (
                     <CreateLoanForm
                         onSuccess={addLoanToHistory}
@@ -59,19 +52,47 @@ new_create_content = '''                {activeTab === 'create' ? (
                     </div>
                 ) :'''
 
-if old_create_content in content:
-    content = content.replace(old_create_content, new_create_content)
-    print("✅ Updated 'create' tab to show 2 columns")
-else:
-    print("⚠️  Could not find exact match for content section")
-    # Try alternative approach
-    import re
-    # This is a fallback - we'll handle it manually if needed
 
-# Write back
-with open('app/farmer/page.tsx', 'w') as f:
-    f.write(content)
+RULES = RuleSet([
+    # 1. Update activeTab type - remove 'loans'
+    Rule('active_tab_type',
+         "useState<'create' | 'loans' | 'nfts'>('create')",
+         "useState<'create' | 'nfts'>('create')"),
+    # 2. Remove "My Loans" tab button
+    Rule('my_loans_button', my_loans_button, ''),
+    # 3. Two-column 'create' tab
+    Rule('create_content', old_create_content, new_create_content),
+])
+STEPS = [
+    ('rules', RULES),
+    # Match again ignoring whitespace and indentation
+    ('reformatted', 'create_content_reformatted', 'create_content', old_create_content, new_create_content),
+]
+# While this stage is pending, watch mode re-runs it only for edits near one
+# of these (see codemod/watch.py)
+TRIGGERS = tuple(RULES.patterns)
+
+
+def transform(content):
+    content, hits = run_steps(content, STEPS)
+
+    if hits['active_tab_type']:
+        print("✅ Tab structure updated!")
+    if hits['my_loans_button']:
+        print("✅ Removed 'My Loans' tab button")
+
+    if hits['create_content']:
+        print("✅ 'Create New Loan' tab now shows form + list in 2 columns")
+    elif hits['create_content_reformatted']:
+        print("✅ 'Create New Loan' tab now shows form + list in 2 columns (reformatted match)")
+    else:
+        print("⚠️  Could not find exact match for content section")
+
+    return content
+
+
+if __name__ == '__main__':
+    timings, changed = run_migration(TARGET, Stage('restructure_tabs', transform))
 
-print("✅ Tab structure updated!")
-print("✅ Removed 'My Loans' tab button")
-print("✅ 'Create New Loan' tab now shows form + list in 2 columns")
+    if timings and not changed:
+        print("ℹ️  Nothing to change, tabs already restructured")
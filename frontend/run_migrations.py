@@ -0,0 +1,186 @@
+#!/usr/bin/env python3
+"""Run all frontend migrations, reading and writing each target file once.
+
+Usage: python3 run_migrations.py [--no-cache] [--dry-run] [--emit-patch FILE]
+                                 [--metrics FILE] [--profile] [FRONTEND_DIR ...]
+       python3 run_migrations.py --baseline all|MIGRATION,... [FRONTEND_DIR ...]
+       python3 run_migrations.py --build-pack
+
+Each FRONTEND_DIR (default: current directory) is a frontend checkout. For
+every target file the scripts below run as in-memory stages over a shared
+buffer, in the order listed. Each stage is a migration applied once per
+file: FRONTEND_DIR/.codemod-journal.json records the ones applied (see
+codemod/journal.py) and only pending ones run. Files unchanged since the
+last run are skipped using the cache stored in FRONTEND_DIR/.codemod-cache.json.
+
+--baseline records the given migrations (stage names, or 'all') as applied
+without running them, for checkouts migrated before the journal existed.
+
+--dry-run reports what would change without writing; --emit-patch writes a
+unified diff of all changes to FILE ('-' for stdout, progress then goes to
+stderr) instead of touching the working tree. Apply it with apply_patch.py,
+which records the migrations it applies in the journal.
+
+--metrics FILE writes one JSON record per rule application (see
+codemod/metrics.py) and --profile prints the hottest rules and files.
+
+--build-pack compiles the stages below into .codemod-rules.pack, which
+migrate_file.py loads to migrate single files without importing the scripts.
+"""
+import argparse
+import contextlib
+import os
+import sys
+
+import add_nft_tab
+import fix_imports
+import fix_wheat_import
+import remove_indonesian_text
+import restructure_tabs
+import update_crop_dropdown
+from codemod import metrics, pack
+from codemod.cache import CACHE_FILE, FileCache
+from codemod.crops import CATALOG_PATH
+from codemod.journal import Journal
+from codemod.patch import migrations_header, unified_diff
+from codemod.pipeline import Stage, process_file, read_file, run_file
+
+MIGRATIONS = {
+    'app/farmer/page.tsx': [
+        Stage('add_nft_tab', add_nft_tab.transform, add_nft_tab.TRIGGERS),
+        Stage('fix_imports', fix_imports.transform, fix_imports.TRIGGERS),
+        Stage('fix_wheat_import', fix_wheat_import.transform, fix_wheat_import.TRIGGERS),
+        Stage('restructure_tabs', restructure_tabs.transform, restructure_tabs.TRIGGERS),
+        Stage('update_crop_dropdown', update_crop_dropdown.transform, update_crop_dropdown.TRIGGERS),
+    ],
+    'components/CreateHarvestNFTForm.tsx': [
+        # The option label regex can match across lines: no triggers
+        Stage('remove_indonesian_text', remove_indonesian_text.transform),
+    ],
+}
+
+
+def print_timings(path, timings, changed, dry_run=False):
+    total = sum(seconds for _, seconds in timings)
+    if dry_run:
+        status = 'would change' if changed else 'no changes'
+    else:
+        status = 'written' if changed else 'no changes'
+    print(f"⏱️  {path} ({total * 1000:.2f} ms, {status})")
+    for name, seconds in timings:
+        print(f"    {name:<24} {seconds * 1000:8.2f} ms")
+
+
+def preview_file(path, target, stages, journal, patch_out=None):
+    """Run the pending ``stages`` over ``path`` in memory, streaming a diff to
+    ``patch_out``, headed by the migrations it applies."""
+    original, content, timings, applied = process_file(path, stages, journal)
+    if patch_out is not None and content != original:
+        patch_out.write(migrations_header(target, applied))
+        patch_out.writelines(unified_diff(os.path.normpath(path), original, content))
+    return timings, content != original
+
+
+def migrate(roots, use_cache=True, dry_run=False, patch_out=None):
+    for root in roots:
+        cache = FileCache(os.path.join(root, CACHE_FILE)) if use_cache else None
+        journal = Journal.for_root(root)
+        for target, stages in MIGRATIONS.items():
+            path = os.path.join(root, target)
+            if not os.path.exists(path):
+                print(f"⚠️  Skipping {path}: file not found")
+                continue
+            if dry_run:
+                result = preview_file(path, target, stages, journal, patch_out)
+            else:
+                result = run_file(path, stages, cache=cache, journal=journal)
+            if result is None:
+                print(f"⏭️  {path} unchanged since last run")
+            elif not result[0]:
+                print(f"⏭️  {path} has no pending migrations")
+            else:
+                print_timings(path, *result, dry_run=dry_run)
+        if not dry_run:
+            journal.save()
+            if cache is not None:
+                cache.save()
+
+
+def baseline(roots, names=None):
+    """Record the migrations in ``names`` (default: all) as applied."""
+    for root in roots:
+        journal = Journal.for_root(root)
+        for target, stages in MIGRATIONS.items():
+            stages = [stage for stage in stages if names is None or stage.name in names]
+            if not stages:
+                continue
+            path = os.path.join(root, target)
+            if not os.path.exists(path):
+                print(f"⚠️  Skipping {path}: file not found")
+                continue
+            added = journal.baseline(path, stages, read_file(path))
+            if added:
+                print(f"✅ {path}: recorded {', '.join(added)} as applied")
+            else:
+                print(f"ℹ️  {path}: already recorded")
+        journal.save()
+
+
+def run(args):
+    dry_run = args.dry_run or args.emit_patch is not None
+    if args.emit_patch is None:
+        migrate(args.roots, not args.no_cache, dry_run)
+    elif args.emit_patch == '-':
+        # Keep stdout for the patch itself
+        with contextlib.redirect_stdout(sys.stderr):
+            migrate(args.roots, not args.no_cache, dry_run, patch_out=sys.__stdout__)
+    else:
+        with open(args.emit_patch, 'w', encoding='utf-8') as patch_out:
+            migrate(args.roots, not args.no_cache, dry_run, patch_out)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('roots', nargs='*', default=['.'], help='frontend checkouts to migrate')
+    parser.add_argument('--no-cache', action='store_true', help='process every file even if unchanged')
+    parser.add_argument('--dry-run', action='store_true', help='report changes without writing files')
+    parser.add_argument('--emit-patch', metavar='FILE',
+                        help="write a unified diff of the changes to FILE ('-' for stdout); implies --dry-run")
+    parser.add_argument('--metrics', metavar='FILE', help='write per-rule metrics as JSON lines to FILE')
+    parser.add_argument('--profile', action='store_true', help='print the hottest rules and files')
+    parser.add_argument('--baseline', metavar='MIGRATIONS',
+                        help="record MIGRATIONS (comma-separated stage names, or 'all') as applied without running them")
+    parser.add_argument('--build-pack', action='store_true',
+                        help=f'compile the migrations into {os.path.basename(pack.PACK_PATH)} for migrate_file.py')
+    args = parser.parse_args()
+
+    if args.build_pack:
+        count = pack.build(MIGRATIONS, extra_sources=[CATALOG_PATH])
+        print(f"✅ Rule pack written: {pack.PACK_PATH} ({count} stages)")
+        return
+    if args.baseline:
+        names = None if args.baseline == 'all' else set(args.baseline.split(','))
+        unknown = (names or set()) - {stage.name for stages in MIGRATIONS.values() for stage in stages}
+        if unknown:
+            parser.error(f"unknown migration(s): {', '.join(sorted(unknown))}")
+        baseline(args.roots, names)
+        return
+
+    with contextlib.ExitStack() as stack:
+        if args.metrics:
+            stream = stack.enter_context(open(args.metrics, 'w', encoding='utf-8'))
+            metrics.add_hook(metrics.JsonLinesHook(stream))
+        profile = None
+        if args.profile:
+            profile = metrics.Profile()
+            metrics.add_hook(profile)
+        run(args)
+
+    log = sys.stderr if args.emit_patch == '-' else sys.stdout
+    if profile is not None:
+        print(profile.report(), file=log)
+    print("✅ Migrations complete!", file=log)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,86 @@
+"""Which migrations the journal lists as applied (codemod/journal.py).
+
+Run from frontend/: python3 -m pytest tests
+"""
+from codemod.journal import Journal
+from codemod.pipeline import Stage
+
+STAGES = [Stage('first', None), Stage('second', None), Stage('third', None)]
+
+
+def _journal(tmp_path):
+    return Journal.for_root(str(tmp_path))
+
+
+def _pending(journal, path, content):
+    return [stage.name for stage in journal.pending(path, STAGES, content)]
+
+
+def test_record_and_reload(tmp_path):
+    path = str(tmp_path / 'page.tsx')
+    journal = _journal(tmp_path)
+    journal.record(path, 'v0', ['first', 'second'], 'v2')
+    journal.save()
+    assert _pending(_journal(tmp_path), path, 'v2') == ['third']
+
+
+def test_edit_after_migrations_keeps_them_applied(tmp_path):
+    path = str(tmp_path / 'page.tsx')
+    journal = _journal(tmp_path)
+    journal.record(path, 'v0', ['first', 'second'], 'v2')
+    assert _pending(journal, path, 'v2 edited') == ['third']
+
+
+def test_revert_to_a_start_hash_makes_later_migrations_pending(tmp_path):
+    path = str(tmp_path / 'page.tsx')
+    journal = _journal(tmp_path)
+    journal.record(path, 'v0', ['first'], 'v1')
+    journal.record(path, 'v1', ['second'], 'v2')
+    # Back to before 'second' only, then to before both
+    assert _pending(journal, path, 'v1') == ['second', 'third']
+    assert _pending(journal, path, 'v0') == ['first', 'second', 'third']
+
+
+def test_record_after_revert_replaces_the_reverted_migrations(tmp_path):
+    path = str(tmp_path / 'page.tsx')
+    journal = _journal(tmp_path)
+    journal.record(path, 'v0', ['first'], 'v1')
+    journal.record(path, 'v1', ['second'], 'v2')
+    journal.record(path, 'v1', ['third'], 'v3')
+    assert journal.applied(path, 'v3') == ['first', 'third']
+
+
+def test_nothing_recorded_for_no_migrations(tmp_path):
+    path = str(tmp_path / 'page.tsx')
+    journal = _journal(tmp_path)
+    journal.record(path, 'v0', [], 'v0')
+    assert not journal.dirty
+    assert _pending(journal, path, 'v0') == ['first', 'second', 'third']
+
+
+def test_baseline_has_no_start_hash(tmp_path):
+    path = str(tmp_path / 'page.tsx')
+    journal = _journal(tmp_path)
+    assert journal.baseline(path, STAGES[:2], 'migrated') == ['first', 'second']
+    assert journal.baseline(path, STAGES[:2], 'migrated') == []
+    assert _pending(journal, path, 'migrated') == ['third']
+    # The content before a baseline is unknown, so no revert is detected
+    assert _pending(journal, path, 'anything else') == ['third']
+
+
+def test_revert_past_a_baseline_keeps_the_baselined_migrations(tmp_path):
+    path = str(tmp_path / 'page.tsx')
+    journal = _journal(tmp_path)
+    journal.baseline(path, STAGES[:1], 'v1')
+    journal.record(path, 'v1', ['second'], 'v2')
+    assert _pending(journal, path, 'v2') == ['third']
+    assert _pending(journal, path, 'v1') == ['second', 'third']
+
+
+def test_baseline_after_record_keeps_start_hashes(tmp_path):
+    path = str(tmp_path / 'page.tsx')
+    journal = _journal(tmp_path)
+    journal.record(path, 'v0', ['first'], 'v1')
+    assert journal.baseline(path, STAGES, 'v1') == ['second', 'third']
+    assert _pending(journal, path, 'v1') == []
+    assert _pending(journal, path, 'v0') == ['first', 'second', 'third']
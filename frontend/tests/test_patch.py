@@ -0,0 +1,127 @@
+"""Parsing and applying unified diffs (codemod/patch.py).
+
+Run from frontend/: python3 -m pytest tests
+"""
+import pytest
+
+from codemod.journal import Journal
+from codemod.patch import PatchError, apply_hunks, apply_patch, migrations_header, parse_patch, unified_diff
+
+TARGET = 'app/farmer/page.tsx'
+PAGE = ''.join(f'line {i}\n' for i in range(1, 21))
+
+
+def _lines(text):
+    return text.splitlines(keepends=True)
+
+
+def _write(root, path, content):
+    full = root / path
+    full.parent.mkdir(parents=True, exist_ok=True)
+    full.write_text(content, encoding='utf-8')
+    return full
+
+
+def _apply(patch, content):
+    (file_patch,) = parse_patch(_lines(patch))
+    return apply_hunks(content, file_patch.hunks)
+
+
+def test_emitted_patch_round_trip_records_migrations(tmp_path):
+    page = _write(tmp_path, TARGET, PAGE)
+    after = PAGE.replace('line 3\n', 'line three\n').replace('line 17\n', 'line 17\nline 17b\n')
+    patch = migrations_header(TARGET, ['first', 'second']) + ''.join(unified_diff(TARGET, PAGE, after))
+
+    assert apply_patch(_lines(patch), root=str(tmp_path)) == [str(tmp_path / TARGET)]
+    assert page.read_text() == after
+    journal = Journal.for_root(str(tmp_path))
+    assert journal.applied(str(page), after) == ['first', 'second']
+
+
+def test_check_writes_nothing(tmp_path):
+    page = _write(tmp_path, TARGET, PAGE)
+    patch = migrations_header(TARGET, ['first']) + ''.join(unified_diff(TARGET, PAGE, PAGE.replace('line 3', 'x')))
+    apply_patch(_lines(patch), root=str(tmp_path), check=True)
+    assert page.read_text() == PAGE
+    assert not (tmp_path / '.codemod-journal.json').exists()
+
+
+def test_hunk_applies_at_an_offset():
+    patch = ''.join(unified_diff(TARGET, PAGE, PAGE.replace('line 10\n', 'line ten\n')))
+    shifted = 'new 1\nnew 2\nnew 3\n' + PAGE
+    assert _apply(patch, shifted) == shifted.replace('line 10\n', 'line ten\n')
+
+
+def test_hunk_applies_at_the_nearest_match():
+    content = 'a\nb\nc\n' + 'x\n' * 10 + 'a\nb\nc\n' + 'y\n' * 2
+    patch = '--- a/f\n+++ b/f\n@@ -12,3 +12,3 @@\n a\n-b\n+B\n c\n'
+    # Both copies match; the second is closer to line 12
+    assert _apply(patch, content) == 'a\nb\nc\n' + 'x\n' * 10 + 'a\nB\nc\n' + 'y\n' * 2
+
+
+def test_no_newline_at_end_of_file():
+    before = 'one\ntwo\nthree'
+    after = 'one\ntwo\nthree\nfour'
+    patch = ''.join(unified_diff('f', before, after))
+    assert '\\ No newline at end of file\n' in patch
+    assert _apply(patch, before) == after
+
+    # Adding the final newline
+    patch = ''.join(unified_diff('f', before, before + '\n'))
+    assert _apply(patch, before) == before + '\n'
+
+
+def test_failing_hunk_leaves_the_tree_untouched(tmp_path):
+    first = _write(tmp_path, 'components/First.tsx', PAGE)
+    second = _write(tmp_path, TARGET, PAGE)
+    patch = (''.join(unified_diff('components/First.tsx', PAGE, PAGE.replace('line 2\n', 'line two\n')))
+             + migrations_header(TARGET, ['second'])
+             + ''.join(unified_diff(TARGET, PAGE.replace('line 5', 'other'), 'changed\n')))
+
+    with pytest.raises(PatchError, match='does not apply'):
+        apply_patch(_lines(patch), root=str(tmp_path))
+    assert first.read_text() == PAGE
+    assert second.read_text() == PAGE
+    assert not (tmp_path / '.codemod-journal.json').exists()
+
+
+def test_multi_file_patch_with_git_headers(tmp_path):
+    first = _write(tmp_path, 'lib/a.ts', 'export const a = 1\n')
+    second = _write(tmp_path, 'lib/b.ts', 'export const b = 1\n')
+    patch = '''diff --git a/lib/a.ts b/lib/a.ts
+index 1111111..2222222 100644
+--- a/lib/a.ts
++++ b/lib/a.ts
+@@ -1 +1 @@
+-export const a = 1
++export const a = 2
+diff --git a/lib/b.ts b/lib/b.ts
+index 3333333..4444444 100644
+--- a/lib/b.ts
++++ b/lib/b.ts
+@@ -1 +1,2 @@
+ export const b = 1
++export const c = 3
+diff --git a/lib/new.ts b/lib/new.ts
+new file mode 100644
+--- /dev/null
++++ b/lib/new.ts
+@@ -0,0 +1 @@
++export const d = 4
+'''
+    patches = parse_patch(_lines(patch))
+    assert [(p.old_path, p.new_path) for p in patches] == [
+        ('lib/a.ts', 'lib/a.ts'), ('lib/b.ts', 'lib/b.ts'), (None, 'lib/new.ts')]
+
+    apply_patch(_lines(patch), root=str(tmp_path))
+    assert first.read_text() == 'export const a = 2\n'
+    assert second.read_text() == 'export const b = 1\nexport const c = 3\n'
+    assert (tmp_path / 'lib/new.ts').read_text() == 'export const d = 4\n'
+
+
+def test_migrations_header_must_match_the_file(tmp_path):
+    _write(tmp_path, 'components/Other.tsx', PAGE)
+    patch = migrations_header(TARGET, ['first']) + ''.join(
+        unified_diff('components/Other.tsx', PAGE, PAGE.replace('line 1\n', '')))
+    with pytest.raises(PatchError, match='migrations header'):
+        apply_patch(_lines(patch), root=str(tmp_path))
@@ -0,0 +1,64 @@
+"""Streaming rewrites must match the in-memory ones byte for byte.
+
+Run from frontend/: python3 -m pytest tests
+"""
+import io
+
+import pytest
+
+from codemod.crops import replace_dropdowns
+from codemod.stream import stream_dropdowns, stream_sub
+from remove_indonesian_text import MAX_MATCH, OPTION_LABEL_RE
+from update_crop_dropdown import fragment, old_dropdown
+
+# Small enough for chunk boundaries to fall inside, and around, every select
+CHUNK_SIZES = (1, 7, 64, 333, 4096)
+
+OTHER_SELECT = '''                    <select
+                        className="input"
+                        value={selectedNFTId}
+                        onChange={(e) => setSelectedNFTId(e.target.value)}
+                    >
+                        <option value="">Select an NFT</option>
+                    </select>'''
+# Selects sharing their line with other markup, or with another select
+INLINE_SELECT = '<label>Crop</label> ' + old_dropdown.lstrip()
+ADJACENT_SELECTS = OTHER_SELECT + old_dropdown.lstrip()
+
+
+def _page(copies=12):
+    blocks = []
+    for i in range(copies):
+        blocks += [f'            <div key="{i}">', old_dropdown, OTHER_SELECT, '            </div>']
+        if i % 3 == 0:
+            blocks.append(INLINE_SELECT)
+        elif i % 3 == 1:
+            blocks.append(ADJACENT_SELECTS)
+        blocks.append('\t' * (i % 4) + old_dropdown.lstrip())
+    return '\n'.join(blocks) + '\n'
+
+
+def _stream(rewrite, content, chunk_size):
+    dst = io.StringIO()
+    count = rewrite(io.StringIO(content), dst, chunk_size=chunk_size)
+    return dst.getvalue(), count
+
+
+@pytest.mark.parametrize('chunk_size', CHUNK_SIZES)
+def test_stream_dropdowns_matches_in_memory(chunk_size):
+    content = _page()
+    expected = replace_dropdowns(content, fragment)
+    assert expected[1]
+    assert _stream(lambda src, dst, chunk_size: stream_dropdowns(fragment, src, dst, chunk_size),
+                   content, chunk_size) == expected
+
+
+@pytest.mark.parametrize('chunk_size', CHUNK_SIZES)
+def test_stream_sub_matches_in_memory(chunk_size):
+    content = _page().replace('🌽 Corn</option>', '🌽 Corn (Jagung)</option>')
+    content += ' (' + 'x' * 300 + ')</option>\n'
+    expected = OPTION_LABEL_RE.subn('</option>', content)
+    assert expected[1]
+    assert _stream(lambda src, dst, chunk_size: stream_sub(OPTION_LABEL_RE, '</option>', src, dst, MAX_MATCH,
+                                                           chunk_size),
+                   content, chunk_size) == expected
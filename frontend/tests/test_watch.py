@@ -0,0 +1,70 @@
+"""Watch mode re-runs only the pending stages an edit touches.
+
+Run from frontend/: python3 -m pytest tests
+"""
+from codemod.journal import Journal
+from codemod.pipeline import Stage
+from codemod.watch import IncrementalRunner
+
+PAGE = 'header\n' + 'filler\n' * 50 + 'OLD block\n'
+
+
+def _runner(tmp_path, full=False, page=PAGE):
+    path = tmp_path / 'page.tsx'
+    path.write_text(page)
+    calls = []
+
+    def replacing(name, old, new):
+        def transform(content):
+            calls.append(name)
+            return content.replace(old, new)
+        return Stage(name, transform, (old,))
+
+    # 'missing' finds nothing, so the journal keeps it pending
+    stages = [replacing('swap', 'OLD block', 'NEW block'), replacing('missing', 'MISSING', 'found')]
+    runner = IncrementalRunner({str(path): stages}, {str(path): Journal.for_root(str(tmp_path))}, full=full)
+    return runner, path, calls
+
+
+def _save(runner, path, content, calls):
+    calls.clear()
+    path.write_text(content)
+    return runner.update(str(path))
+
+
+def test_first_run_runs_every_pending_stage(tmp_path):
+    runner, path, calls = _runner(tmp_path)
+    _, changed = runner.update(str(path))
+    assert changed and calls == ['swap', 'missing']
+    assert path.read_text().endswith('NEW block\n')
+
+
+def test_untouched_pending_stage_is_skipped(tmp_path):
+    runner, path, calls = _runner(tmp_path)
+    runner.update(str(path))
+    assert _save(runner, path, path.read_text() + 'unrelated\n', calls) == ([], False)
+    assert calls == []
+
+
+def test_edit_adding_a_trigger_runs_its_stage(tmp_path):
+    runner, path, calls = _runner(tmp_path)
+    runner.update(str(path))
+    _, changed = _save(runner, path, path.read_text() + 'MISSING\n', calls)
+    assert changed and calls == ['missing']
+    assert path.read_text().endswith('found\n')
+
+
+def test_full_runs_every_pending_stage(tmp_path):
+    runner, path, calls = _runner(tmp_path, full=True)
+    runner.update(str(path))
+    _save(runner, path, path.read_text() + 'unrelated\n', calls)
+    assert calls == ['missing']
+
+
+def test_revert_reruns_reverted_migrations(tmp_path):
+    page = PAGE + 'MISSING\n'
+    runner, path, calls = _runner(tmp_path, page=page)
+    runner.update(str(path))
+    # Back to the content both started from: both are pending again
+    _, changed = _save(runner, path, page, calls)
+    assert changed and calls == ['swap', 'missing']
@@ -1,8 +1,16 @@
 #!/usr/bin/env python3
+import argparse
+from functools import partial
 
-# Read the file
-with open('app/farmer/page.tsx', 'r') as f:
-    content = f.read()
+from codemod.crops import FragmentCache, compile_fragment, replace_dropdowns
+from codemod.journal import run_migration
+from codemod.parallel import discover, run_parallel
+from codemod.pipeline import Stage, read_file, update_file
+from codemod.rules import Rule, RuleSet
+from codemod.steps import run_steps
+from codemod.stream import stream_dropdowns, stream_file
+
+TARGET = 'app/farmer/page.tsx'
 
 # Old crop type dropdown (simple version)
 old_dropdown = '''                                <select
@@ -20,121 +28,81 @@ old_dropdown = '''                                <select
                                     <option value="Cotton">🌱 Cotton</option>
                                 </select>'''
 
-# New comprehensive dropdown (without Indonesian text)
-new_dropdown = '''                                <select
-                                    className="input"
-                                    value={formData.cropType}
-                                    onChange={(e) => setFormData({ ...formData, cropType: e.target.value })}
-                                    required
-                                >
-                                    <option value="">Select your crop type</option>
-                                    
-                                    {/* Cereals & Grains */}
-                                    <optgroup label="🌾 Cereals & Grains">
-                                        <option value="Rice">Rice</option>
-                                        <option value="Wheat">Wheat</option>
-                                        <option value="Corn">Corn</option>
-                                        <option value="Barley">Barley</option>
-                                        <option value="Oats">Oats</option>
-                                        <option value="Sorghum">Sorghum</option>
-                                        <option value="Millet">Millet</option>
-                                    </optgroup>
-                                    
-                                    {/* Legumes */}
-                                    <optgroup label="🫘 Legumes">
-                                        <option value="Soybean">Soybean</option>
-                                        <option value="Peanut">Peanut</option>
-                                        <option value="Green Bean">Green Bean</option>
-                                        <option value="Red Bean">Red Bean</option>
-                                        <option value="Chickpea">Chickpea</option>
-                                        <option value="Lentil">Lentil</option>
-                                    </optgroup>
-                                    
-                                    {/* Vegetables */}
-                                    <optgroup label="🥬 Vegetables">
-                                        <option value="Tomato">Tomato</option>
-                                        <option value="Potato">Potato</option>
-                                        <option value="Onion">Onion</option>
-                                        <option value="Garlic">Garlic</option>
-                                        <option value="Cabbage">Cabbage</option>
-                                        <option value="Carrot">Carrot</option>
-                                        <option value="Chili">Chili</option>
-                                        <option value="Eggplant">Eggplant</option>
-                                        <option value="Cucumber">Cucumber</option>
-                                        <option value="Lettuce">Lettuce</option>
-                                    </optgroup>
-                                    
-                                    {/* Fruits */}
-                                    <optgroup label="🍎 Fruits">
-                                        <option value="Banana">Banana</option>
-                                        <option value="Mango">Mango</option>
-                                        <option value="Papaya">Papaya</option>
-                                        <option value="Pineapple">Pineapple</option>
-                                        <option value="Watermelon">Watermelon</option>
-                                        <option value="Melon">Melon</option>
-                                        <option value="Orange">Orange</option>
-                                        <option value="Apple">Apple</option>
-                                        <option value="Strawberry">Strawberry</option>
-                                        <option value="Durian">Durian</option>
-                                    </optgroup>
-                                    
-                                    {/* Cash Crops */}
-                                    <optgroup label="☕ Cash Crops">
-                                        <option value="Coffee">Coffee</option>
-                                        <option value="Cocoa">Cocoa</option>
-                                        <option value="Tea">Tea</option>
-                                        <option value="Rubber">Rubber</option>
-                                        <option value="Palm Oil">Palm Oil</option>
-                                        <option value="Sugarcane">Sugarcane</option>
-                                        <option value="Cotton">Cotton</option>
-                                        <option value="Tobacco">Tobacco</option>
-                                    </optgroup>
-                                    
-                                    {/* Spices & Herbs */}
-                                    <optgroup label="🌿 Spices & Herbs">
-                                        <option value="Black Pepper">Black Pepper</option>
-                                        <option value="Ginger">Ginger</option>
-                                        <option value="Turmeric">Turmeric</option>
-                                        <option value="Galangal">Galangal</option>
-                                        <option value="Lemongrass">Lemongrass</option>
-                                        <option value="Vanilla">Vanilla</option>
-                                        <option value="Cinnamon">Cinnamon</option>
-                                        <option value="Clove">Clove</option>
-                                        <option value="Nutmeg">Nutmeg</option>
-                                    </optgroup>
-                                    
-                                    {/* Root Crops */}
-                                    <optgroup label="🥔 Root Crops">
-                                        <option value="Cassava">Cassava</option>
-                                        <option value="Sweet Potato">Sweet Potato</option>
-                                        <option value="Taro">Taro</option>
-                                        <option value="Yam">Yam</option>
-                                    </optgroup>
-                                    
-                                    {/* Other */}
-                                    <optgroup label="🌱 Other">
-                                        <option value="Mushroom">Mushroom</option>
-                                        <option value="Bamboo">Bamboo</option>
-                                        <option value="Other">Other</option>
-                                    </optgroup>
-                                </select>'''
+# New comprehensive dropdown (without Indonesian text), generated from
+# codemod/crop_catalog.json
+fragment = compile_fragment('en')
+new_dropdown, _ = replace_dropdowns(old_dropdown, fragment)
+
+# Options of the old dropdown, to spot selects whose attributes have changed
+old_options = old_dropdown[old_dropdown.index('<option value="">'):]
+
+
+RULES = RuleSet([Rule('crop_dropdown', old_dropdown, new_dropdown)])
+STEPS = [
+    ('rules', RULES),
+    # Match again ignoring whitespace and indentation
+    ('reformatted', 'crop_dropdown_reformatted', 'crop_dropdown', old_dropdown, new_dropdown),
+    # Failing that, find just the options part and regenerate them in place
+    ('regenerate', 'crop_options_regenerated', 'crop_dropdown_reformatted', old_options, fragment),
+]
+# While this stage is pending, watch mode re-runs it only for edits near one
+# of these (see codemod/watch.py)
+TRIGGERS = tuple(RULES.patterns)
+
+
+def transform(content):
+    content, hits = run_steps(content, STEPS)
+    if hits['crop_dropdown']:
+        print("✅ Crop type dropdown updated in Create New Loan form")
+        return content
 
-# Replace
-if old_dropdown in content:
-    content = content.replace(old_dropdown, new_dropdown)
-    print("✅ Crop type dropdown updated in Create New Loan form")
-else:
     print("⚠️  Could not find exact match, trying alternative...")
-    # Try to find and replace just the options part
-    import re
-    pattern = r'<option value="">Select your crop type</option>\s*<option value="Corn">🌽 Corn</option>.*?</select>'
-    if re.search(pattern, content, re.DOTALL):
+    if hits['crop_dropdown_reformatted']:
+        print("✅ Crop type dropdown updated (reformatted match)")
+    elif hits.get('crop_options_regenerated'):
+        print("✅ Crop type options regenerated from catalog")
+    elif 'crop_options_regenerated' in hits:
         print("Found pattern, but manual replacement needed")
     else:
         print("❌ Pattern not found")
+    return content
+
+
+def process_file(path, fragment, stream=False):
+    """Regenerate every crop dropdown in ``path``; return the number updated."""
+    if stream:
+        return stream_file(path, partial(stream_dropdowns, fragment))
+    original = read_file(path)
+    content, count = replace_dropdowns(original, fragment)
+    update_file(path, original, content)
+    return count
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Update crop type dropdowns from the crop catalog.')
+    parser.add_argument('--all', nargs='?', const='.', metavar='ROOT',
+                        help='regenerate every crop dropdown under ROOT/app and ROOT/components')
+    parser.add_argument('--locale', default='en', help="catalog locale, e.g. 'en', 'id' or 'en+id' (default: en)")
+    parser.add_argument('--stream', action='store_true', help='with --all, rewrite files in bounded memory')
+    parser.add_argument('--jobs', '-j', type=int, default=None,
+                        help='worker processes for --all (default: CPU count)')
+    args = parser.parse_args()
+
+    if args.all is None:
+        timings, changed = run_migration(TARGET, Stage('update_crop_dropdown', transform))
+        if changed:
+            print("✅ File updated!")
+        elif timings:
+            print("ℹ️  Nothing to change")
+        return
+
+    fragment = compile_fragment(args.locale, cache=FragmentCache())
+    results = run_parallel(partial(process_file, fragment=fragment, stream=args.stream), discover(args.all), jobs=args.jobs)
+    changed = [(path, count) for path, count in results if count]
+    for path, count in changed:
+        print(f"✅ {path}: updated {count} dropdown(s)")
+    print(f"✅ Updated crop dropdowns in {len(changed)} of {len(results)} files ({args.locale})")
 
-# Write back
-with open('app/farmer/page.tsx', 'w') as f:
-    f.write(content)
 
-print("✅ File updated!")
+if __name__ == '__main__':
+    main()
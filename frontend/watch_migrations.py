@@ -0,0 +1,85 @@
+#!/usr/bin/env python3
+"""Watch the migration targets and apply pending migrations as they are edited.
+
+Usage: python3 watch_migrations.py [--poll] [--debounce MS] [--full] [--verbose] [FRONTEND_DIR ...]
+
+Every target of run_migrations.py found under each FRONTEND_DIR (default:
+current directory) is migrated once on startup, then checked again each
+time it is saved. Only migrations pending in FRONTEND_DIR/.codemod-journal.json
+run (see codemod/journal.py), and of those only the ones whose target text
+the edit touched (all of them with --full, see codemod/watch.py). A file
+reverted to a state from before its migrations gets them all again. Changes
+are seen through inotify where available, otherwise by polling (forced with
+--poll). Stop with Ctrl+C.
+"""
+import argparse
+import contextlib
+import os
+
+from codemod.journal import Journal
+from codemod.watch import DEBOUNCE, IncrementalRunner, make_watcher, watch
+from run_migrations import MIGRATIONS, print_timings
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('roots', nargs='*', default=['.'], help='frontend checkouts to watch')
+    parser.add_argument('--poll', action='store_true', help='poll file stats instead of using inotify')
+    parser.add_argument('--debounce', type=float, default=DEBOUNCE * 1000,
+                        help='quiet period in ms that ends a burst of saves (default: %(default)s)')
+    parser.add_argument('--full', action='store_true',
+                        help='run every pending migration on each save, not just those the edit touches')
+    parser.add_argument('--verbose', action='store_true', help='show the output of each migration')
+    args = parser.parse_args()
+
+    targets = {}
+    journals = {}
+    for root in args.roots:
+        journal = Journal.for_root(root)
+        for target, stages in MIGRATIONS.items():
+            path = os.path.join(root, target)
+            if os.path.exists(path):
+                targets[path] = stages
+                journals[path] = journal
+            else:
+                print(f"⚠️  Skipping {path}: file not found")
+    if not targets:
+        print("❌ Nothing to watch")
+        return
+
+    runner = IncrementalRunner(targets, journals, full=args.full)
+    # Report paths the way they were given
+    names = {os.path.abspath(path): path for path in targets}
+
+    def update(path):
+        if args.verbose:
+            return runner.update(path)
+        with open(os.devnull, 'w') as devnull, contextlib.redirect_stdout(devnull):
+            return runner.update(path)
+
+    def report(path, result, seconds):
+        if result is None:
+            return
+        name = names.get(os.path.abspath(path), path)
+        timings, changed = result
+        if timings:
+            print_timings(name, timings, changed)
+        else:
+            print(f"⏭️  {name} ({seconds * 1000:.2f} ms, no pending migration touched)")
+
+    # Initial full run, which also fills the buffer cache
+    for path in targets:
+        report(path, update(path), 0.0)
+
+    watcher = make_watcher(targets, poll=args.poll)
+    print(f"ℹ️  Watching {len(targets)} file(s) with {type(watcher).__name__}, Ctrl+C to stop")
+    try:
+        watch(update, watcher, report, debounce=args.debounce / 1000)
+    except KeyboardInterrupt:
+        print("\n✅ Stopped watching")
+    finally:
+        watcher.close()
+
+
+if __name__ == '__main__':
+    main()